@@ -3,11 +3,21 @@ from flask.cli import AppGroup
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 from flask_swagger_ui import get_swaggerui_blueprint
 from sqlalchemy import MetaData
 
+from auth.cache import UserCache
+from auth.passwords import PasswordHasher
+from auth.revocation import TokenRevocation
+from lostandfound.derivatives import ImageDerivatives
+from utils.compression import init_compression
+from utils.counters import Counters
+from utils.database import init_database
 from utils.handlers import register_handlers
+from utils.metrics import Metrics
+from utils.queries import init_query_budget
+from utils.ratelimit import RateLimiter
+from utils.routing import RoutingSQLAlchemy, init_routing
 
 naming_convention = {
     "ix": 'ix_%(column_0_label)s',
@@ -16,18 +26,31 @@ naming_convention = {
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
     "pk": "pk_%(table_name)s"
 }
-db = SQLAlchemy(metadata=MetaData(naming_convention=naming_convention))
+db = RoutingSQLAlchemy(metadata=MetaData(naming_convention=naming_convention))
 auth_cli = AppGroup('auth')
+doc_cli = AppGroup('doc')
+items_cli = AppGroup('items')
 
 jwt = JWTManager()
-blacklist = set()
-users_tokens = {}
+revocation = TokenRevocation()
+user_cache = UserCache()
+password_hasher = PasswordHasher()
+image_derivatives = ImageDerivatives()
+counters = Counters()
+metrics = Metrics()
+rate_limiter = RateLimiter()
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Full text search tables are created by raw DDL, keep autogenerate from dropping them
+    return not (type_ == 'table' and name.startswith('item_fts'))
 
 
 def create_app(**config_overrides):
     app = Flask(__name__)
-    CORS(app)
     app.cli.add_command(auth_cli)
+    app.cli.add_command(doc_cli)
+    app.cli.add_command(items_cli)
 
     jwt.init_app(app)
 
@@ -37,8 +60,21 @@ def create_app(**config_overrides):
     # apply overrides for tests
     app.config.update(config_overrides)
 
+    # After the config, CORS reads its CORS_* settings once
+    CORS(app)
+
+    # First, so the request latency includes every other hook
+    metrics.init_app(app)
     db.init_app(app)
-    Migrate(app, db, render_as_batch=True)
+    init_database(app, db)
+    init_routing(app)
+    Migrate(app, db, render_as_batch=True, include_object=include_object)
+    revocation.init_app(app, db)
+    user_cache.init_app(app)
+    password_hasher.init_app(app)
+    image_derivatives.init_app(app)
+    counters.init_app(app, db)
+    rate_limiter.init_app(app, db)
 
     from auth.views import auth_app
     from users.views import users_app
@@ -58,5 +94,14 @@ def create_app(**config_overrides):
     app.register_blueprint(swaggerui_blueprint, url_prefix='/doc')
 
     register_handlers(app)
+    init_query_budget(app)
+    init_compression(app)
+    metrics.register_stats('user_cache', user_cache.stats)
+    metrics.register_stats('recent_writers', app.extensions['recent_writers'].stats)
+    metrics.register_stats('image_derivatives', image_derivatives.stats)
+
+    if app.config.get('DOC_SPEC_PRECOMPUTE'):
+        from doc.views import get_spec
+        get_spec(app)
 
     return app
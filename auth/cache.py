@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """Like ``get``, without counting a hit or miss nor refreshing the LRU order."""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[0] if entry is not None and entry[1] >= time.monotonic() else None
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+
+class UserCache:
+    """
+    Caches the users loaded by ``user_loader_callback`` across requests.
+
+    A detached snapshot (without the password hash) is kept per email and
+    merged into the request session without touching the database. The
+    password is lazy loaded when a view actually needs it, so it is never
+    served stale.
+    """
+
+    uncached_columns = ('password',)
+
+    def __init__(self, app=None):
+        self.cache = TTLCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.cache = TTLCache(maxsize=app.config.get('USER_CACHE_SIZE', 1024),
+                              ttl=app.config.get('USER_CACHE_TTL', 60))
+
+    def get_by_email(self, email):
+        from app import db
+        from users.models import User
+        from utils.routing import use_primary
+
+        cached = self.cache.get(email)
+        if cached is not None:
+            return db.session.merge(cached, load=False)
+        # A user read from a lagging replica would stay in the cache after the replica caught up
+        with use_primary():
+            user = User.query.filter_by(email=email).first()
+        if user:
+            self.cache.set(email, self._snapshot(user))
+        return user
+
+    def expire_stale(self, email, version):
+        """
+        Drops the snapshot of ``email`` if the user's ``version``, read from
+        the database by the token check, moved on. Changes made by other
+        workers (password, role, name...) then reach this one's cache on the
+        next request instead of after the TTL.
+        """
+        snapshot = self.cache.peek(email)
+        if snapshot is not None and snapshot.version != version:
+            self.cache.pop(email)
+
+    def invalidate(self, *emails):
+        for email in emails:
+            self.cache.pop(email)
+
+    def stats(self):
+        return self.cache.stats()
+
+    def _snapshot(self, user):
+        columns = user.__table__.columns.keys()
+        snapshot = type(user)(**{column: getattr(user, column)
+                                 for column in columns if column not in self.uncached_columns})
+        make_transient_to_detached(snapshot)
+        return snapshot
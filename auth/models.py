@@ -0,0 +1,7 @@
+from app import db
+
+
+class RevokedToken(db.Model):
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_on = db.Column(db.Integer, nullable=False, index=True)
+
@@ -0,0 +1,99 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from threading import BoundedSemaphore, Lock
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords with the algorithm and work factor set in
+    ``PASSWORD_HASH_METHOD``. With ``PASSWORD_HASH_WORKERS`` the work runs in
+    a process pool so it does not hold the request thread's GIL; at most
+    ``PASSWORD_HASH_MAX_PENDING`` calls may wait for it, further calls get a 503.
+    """
+
+    def __init__(self, app=None):
+        self.method = 'pbkdf2:sha256:{}'.format(DEFAULT_PBKDF2_ITERATIONS)
+        self.salt_length = 8
+        self.workers = 0
+        self.queue_timeout = 0
+        self.retry_after = 1
+        self._slots = None
+        self._pool = None
+        self._pool_lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        method = app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+        if method.startswith('pbkdf2:') and method.count(':') == 1:
+            method = '{}:{}'.format(method, DEFAULT_PBKDF2_ITERATIONS)
+        self.method = method
+        self.salt_length = app.config.get('PASSWORD_HASH_SALT_LENGTH', 8)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.queue_timeout = app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 0)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', 1)
+        max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or self.workers * 4
+        self._slots = BoundedSemaphore(max_pending) if self.workers else None
+
+    def hash(self, password):
+        return self._run(self._generate, password)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def hash_many(self, passwords):
+        """
+        Hashes a batch of passwords (bulk imports). Without
+        ``PASSWORD_HASH_WORKERS`` they are hashed one after the other in the
+        calling thread, like ``hash`` does, so an import uses one core of the
+        web host. With it they are spread over the pool, every password taking
+        one of the slots ``hash`` and ``check`` use, waiting for it, so an
+        import never queues more work than the pool accepts.
+        """
+        if not self.workers:
+            return [self._generate(password) for password in passwords]
+        futures = []
+        for password in passwords:
+            self._slots.acquire()
+            try:
+                future = self._get_pool().submit(self._generate, password)
+            except Exception:
+                self._slots.release()
+                raise
+            future.add_done_callback(lambda future: self._slots.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def needs_rehash(self, pwhash):
+        """Whether ``pwhash`` was made with another method, work factor or salt length than the current ones."""
+        parts = pwhash.split('$', 2)
+        return len(parts) != 3 or parts[0] != self.method or len(parts[1]) != self.salt_length
+
+    @property
+    def _generate(self):
+        return partial(generate_password_hash, method=self.method, salt_length=self.salt_length)
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if self.queue_timeout:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise ServiceUnavailable('Too many password operations in progress, try again later.',
+                                     retry_after=self.retry_after)
+        try:
+            return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_pool(self):
+        # Created on first use so every forked server worker gets its own pool
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
@@ -0,0 +1,92 @@
+import heapq
+import time
+from threading import Lock
+
+
+class MemoryRevocationBackend:
+    """Keeps revoked JTIs in a dict and evicts them once the token expires."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._revoked = {}
+        self._expiry_heap = []
+
+    def is_revoked(self, jti):
+        return jti in self._revoked
+
+    def revoke(self, jti, expires_on):
+        with self._lock:
+            self._revoked[jti] = expires_on
+            heapq.heappush(self._expiry_heap, (expires_on, jti))
+            self._evict(int(time.time()))
+
+    def purge(self, now):
+        with self._lock:
+            self._evict(now)
+
+    def _evict(self, now):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_on, jti = heapq.heappop(heap)
+            if self._revoked.get(jti) == expires_on:
+                del self._revoked[jti]
+
+
+class DatabaseRevocationBackend:
+    """Stores revoked JTIs in the database so every worker shares them."""
+
+    def __init__(self, db, revoked_model, purge_interval):
+        self.db = db
+        self.revoked_model = revoked_model
+        self.purge_interval = purge_interval
+        self._last_purge = 0
+
+    def is_revoked(self, jti):
+        query = self.db.session.query(self.revoked_model.jti).filter_by(jti=jti)
+        return self.db.session.query(query.exists()).scalar()
+
+    def revoke(self, jti, expires_on):
+        self.db.session.merge(self.revoked_model(jti=jti, expires_on=expires_on))
+        self.db.session.commit()
+        now = int(time.time())
+        if now - self._last_purge >= self.purge_interval:
+            self.purge(now)
+
+    def purge(self, now):
+        self._last_purge = now
+        self.revoked_model.query.filter(self.revoked_model.expires_on <= now).delete()
+        self.db.session.commit()
+
+
+class TokenRevocation:
+    """
+    Tracks individually revoked tokens (logouts) until they expire. Revoking
+    every token of a user is done by bumping ``User.token_generation``
+    instead. The backend is picked from ``JWT_REVOCATION_BACKEND``.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        from auth.models import RevokedToken
+
+        backend = app.config.get('JWT_REVOCATION_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = MemoryRevocationBackend()
+        elif backend == 'database':
+            self.backend = DatabaseRevocationBackend(db, RevokedToken,
+                                                     app.config.get('JWT_REVOCATION_PURGE_INTERVAL', 3600))
+        else:
+            raise ValueError('Unknown JWT_REVOCATION_BACKEND: {}'.format(backend))
+
+    def is_revoked(self, jti):
+        return self.backend.is_revoked(jti)
+
+    def revoke(self, jti, expires_on):
+        self.backend.revoke(jti, expires_on)
+
+    def purge(self):
+        self.backend.purge(int(time.time()))
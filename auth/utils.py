@@ -1,30 +1,49 @@
 from functools import wraps
 
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, current_user
+from flask import jsonify, current_app, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, current_user, get_jwt_claims
+from werkzeug.local import LocalProxy
 
-from app import jwt, blacklist
-from users.models import User, Role
+from app import db, jwt, revocation, user_cache
+from users.models import Role, User
+from utils.metrics import timed_phase
+from utils.routing import use_primary
 
 
 @jwt.user_loader_callback_loader
+@timed_phase('user_loader')
 def user_loader_callback(identity):
-    logged_user = User.query.filter_by(email=identity).first()
+    if g.get('defer_user_load'):
+        return LocalProxy(lambda: _load_user_once(identity))
+    logged_user = user_cache.get_by_email(identity)
     return logged_user
 
 
+def _load_user_once(identity):
+    if 'deferred_user' not in g:
+        g.deferred_user = user_cache.get_by_email(identity)
+    return g.deferred_user
+
+
 def role_required(roles):
     def role_required_decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
+            role_claims = current_app.config.get('JWT_ROLE_CLAIMS', False)
+            if role_claims:
+                # Decide from the token alone, the user is only loaded if the view needs it. A role change bumps
+                # the token generation, which check_if_token_in_blacklist reads from the primary, so a stale
+                # role claim is rejected by every worker before this point.
+                g.defer_user_load = True
             verify_jwt_in_request()
-            logged_user = current_user
+            role = get_jwt_claims().get('role') if role_claims else None
+            role = Role(role) if role else current_user.role
             has_permission = False
             if isinstance(roles, Role):
-                if logged_user.role == roles:
+                if role == roles:
                     has_permission = True
             elif isinstance(roles, list):
-                if logged_user.role in roles:
+                if role in roles:
                     has_permission = True
             if not has_permission:
                 return jsonify(msg='User has no permission for action'), 403
@@ -37,6 +56,32 @@ def role_required(roles):
 
 
 @jwt.token_in_blacklist_loader
+@timed_phase('token_check')
 def check_if_token_in_blacklist(decrypted_token):
-    jti = decrypted_token['jti']
-    return jti in blacklist
+    # Never trust a lagging replica or a cached user with revocations, other workers may have bumped the generation
+    identity = decrypted_token[current_app.config['JWT_IDENTITY_CLAIM']]
+    with use_primary():
+        if revocation.is_revoked(decrypted_token['jti']):
+            return True
+        user = db.session.query(User.token_generation, User.version).filter_by(email=identity).first()
+    if user is None:
+        return True
+    token_generation, version = user
+    user_cache.expire_stale(identity, version)
+    claims = decrypted_token.get(current_app.config['JWT_USER_CLAIMS'], {})
+    return claims.get('gen', 0) < token_generation
+
+
+def token_claims(user, refresh_token=None):
+    """
+    Claims embedded in the tokens minted for ``user``. Access tokens also
+    carry the JTI of the refresh token they were issued with, so logging out
+    can revoke both. With ``JWT_ROLE_CLAIMS`` the role and id are added for
+    ``role_required``; a role change bumps the token generation.
+    """
+    claims = {'gen': user.token_generation}
+    if current_app.config.get('JWT_ROLE_CLAIMS', False):
+        claims.update(role=user.role.value, id=user.id)
+    if refresh_token:
+        claims.update(rjti=refresh_token['jti'], rexp=refresh_token['exp'])
+    return claims
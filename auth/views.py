@@ -1,16 +1,19 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import create_access_token, jwt_required, get_raw_jwt, get_jwt_identity, create_refresh_token, \
-    jwt_refresh_token_required, decode_token
-from werkzeug.security import check_password_hash
+    jwt_refresh_token_required, decode_token, get_jwt_claims, current_user
 
-from app import blacklist, users_tokens, jwt
+from app import db, revocation, password_hasher
+from auth.utils import token_claims
 from users.models import User
 from users.schemas import user_schema
+from utils.ratelimit import rate_limit
 
 auth_app = Blueprint('auth_app', __name__, url_prefix='/auth')
 
 
 @auth_app.route('/login', methods=['POST'])
+@rate_limit('RATELIMIT_LOGIN_IP', by='ip')
+@rate_limit('RATELIMIT_LOGIN_EMAIL', by='email')
 def login():
     """
     Performs a user login
@@ -23,23 +26,19 @@ def login():
     responses:
         200:
             description: Login succeeded
+        429:
+            description: Too many attempts from this IP or for this email, see Retry-After
     """
     email = request.json['email']
     password = request.json['password']
     user = User.query.filter_by(email=email).first()
-    if user and check_password_hash(user.password, password):
-        access_token = create_access_token(identity=email)
-        refresh_token = create_refresh_token(identity=email)
-        if email in users_tokens:
-            users_tokens[email].extend([{
-                "access_token": decode_token(access_token)['jti'],
-                "refresh_token": decode_token(refresh_token)['jti']
-            }])
-        else:
-            users_tokens.update({email: [{
-                "access_token": decode_token(access_token)['jti'],
-                "refresh_token": decode_token(refresh_token)['jti']
-            }]})
+    if user and password_hasher.check(user.password, password):
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(password)
+            db.session.commit()
+        refresh_token = create_refresh_token(identity=email, user_claims=token_claims(user))
+        access_token = create_access_token(identity=email,
+                                           user_claims=token_claims(user, decode_token(refresh_token)))
         user_result = user_schema.dump(user)
         return jsonify(message="Login succeeded",
                        access_token=access_token,
@@ -61,8 +60,8 @@ def refresh():
         200:
             description: Access token refreshed
     """
-    current_user = get_jwt_identity()
-    access_token = create_access_token(identity=current_user)
+    access_token = create_access_token(identity=get_jwt_identity(),
+                                       user_claims=token_claims(current_user, get_raw_jwt()))
     return jsonify(access_token=access_token)
 
 
@@ -78,13 +77,9 @@ def logout():
         200:
             description: User logged out
     """
-    jti = get_raw_jwt()['jti']
-    blacklist.add(jti)
-    current_user = get_jwt_identity()
-    if current_user in users_tokens:
-        access_token_kv_list = [kv for kv in users_tokens[current_user] if kv['access_token'] == jti]
-        access_token_kv = next(iter(access_token_kv_list), None)
-        refresh_token = access_token_kv['refresh_token']
-        users_tokens[current_user].remove(access_token_kv)
-        blacklist.add(refresh_token)
+    access_token = get_raw_jwt()
+    revocation.revoke(access_token['jti'], access_token['exp'])
+    claims = get_jwt_claims()
+    if 'rjti' in claims:
+        revocation.revoke(claims['rjti'], claims['rexp'])
     return jsonify(message='Successfully logged out'), 200
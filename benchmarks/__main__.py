@@ -0,0 +1,121 @@
+import glob
+import os
+import shutil
+import sys
+import tempfile
+
+import click
+from flask.cli import load_dotenv
+
+from benchmarks import components, report
+from benchmarks.drivers import run_http, run_inprocess, start_server
+from benchmarks.scenarios import Context, prepare, select
+from benchmarks.seed import bench_config, create_bench_app, seed
+
+COMPONENTS = ['serializer', 'search', 'import_users', 'login_throughput', 'derivatives', 'rate_limiter', 'revocation',
+              'role_check', 'user_cache', 'compression', 'upload_memory', 'export_memory', 'sqlite_contention',
+              'match_insert']
+# Components that need the tokens and ids of the scenario context
+CONTEXT_COMPONENTS = ('rate_limiter', 'role_check', 'user_cache', 'compression', 'upload_memory', 'export_memory',
+                      'sqlite_contention', 'match_insert')
+# Components that need seeded items
+ITEM_COMPONENTS = ('upload_memory', 'sqlite_contention', 'match_insert')
+
+
+@click.group()
+def cli():
+    """Benchmarks of the API, see the Benchmarks section of the README."""
+
+
+@cli.command()
+@click.option('--users', default=1000, show_default=True, help='Users to seed')
+@click.option('--items', default=2000, show_default=True, help='Items to seed')
+@click.option('--requests', default=200, show_default=True, help='Requests per scenario in process')
+@click.option('--http/--no-http', default=True, show_default=True, help='Also load test over HTTP')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent HTTP connections')
+@click.option('--duration', default=5.0, show_default=True, help='Seconds per HTTP scenario')
+@click.option('--only', multiple=True, help='Run only these scenarios and components (repeatable)')
+@click.option('--workdir', type=click.Path(file_okay=False), help='Where the database and images go, '
+                                                                 'a temporary directory by default')
+@click.option('--seed', 'random_seed', default=1, show_default=True, help='Seed of the generated data')
+@click.option('--output', default='benchmark-report.json', show_default=True, type=click.Path(dir_okay=False))
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Report to compare with')
+@click.option('--threshold', default=0.15, show_default=True, help='Allowed regression, 0.15 is 15%')
+def run(users, items, requests, http, concurrency, duration, only, workdir, random_seed, output, baseline,
+        threshold):
+    """Seeds a fresh database, runs the benchmarks and writes the JSON report."""
+    options = dict(users=users, items=items, requests=requests, http=http, concurrency=concurrency,
+                   duration=duration, only=list(only), seed=random_seed)
+    result = report.new_report(options)
+    temporary = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='lostandfound-bench-')
+    _clean(workdir)
+    server = None
+    try:
+        app = create_bench_app(workdir)
+        click.echo('Seeding {} users and {} items in {}'.format(users, items, workdir))
+        seed(app, users, items, seed=random_seed)
+        if items:
+            # Also fills the matches read by the item_matches scenario
+            result['results'].update(components.match_rebuild(app))
+        context = prepare(app, Context(users, items, random_seed))
+
+        scenarios = select(only, items=items > 0)
+        if http and scenarios:
+            server, url = start_server(bench_config(workdir))
+        # Reads of both kinds first, so writes don't change what the reads see (e.g. the users ETag)
+        for writes in (False, True):
+            for scenario in [scenario for scenario in scenarios if scenario.writes == writes]:
+                click.echo('In process: {}'.format(scenario.name))
+                result['results']['inprocess.' + scenario.name] = run_inprocess(app, scenario, context, requests)
+            for scenario in [scenario for scenario in scenarios if scenario.writes == writes and server]:
+                click.echo('HTTP: {}'.format(scenario.name))
+                result['results']['http.' + scenario.name] = run_http(url, scenario, context, concurrency, duration)
+
+        for name in COMPONENTS:
+            if only and name not in only or name in ITEM_COMPONENTS and not items:
+                continue
+            click.echo('Component: {}'.format(name))
+            component = getattr(components, name)
+            result['results'].update(component(app, context) if name in CONTEXT_COMPONENTS else component(app))
+    finally:
+        if server is not None:
+            server.terminate()
+        if temporary:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report.save(result, output)
+    click.echo(report.format_table(result))
+    click.echo('Report written to {}'.format(output))
+    if baseline:
+        _check(result, report.load(baseline), threshold)
+
+
+@cli.command()
+@click.argument('report_path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', default=0.15, show_default=True, help='Allowed regression, 0.15 is 15%')
+def compare(report_path, baseline, threshold):
+    """Compares a report with a baseline, failing on regressions."""
+    _check(report.load(report_path), report.load(baseline), threshold)
+
+
+def _check(result, baseline, threshold):
+    regressions = report.compare(result, baseline, threshold)
+    for regression in regressions:
+        click.echo('Regression: ' + regression, err=True)
+    if regressions:
+        sys.exit(1)
+    click.echo('No regressions over {:.0%} against the baseline'.format(threshold))
+
+
+def _clean(workdir):
+    os.makedirs(workdir, exist_ok=True)
+    for path in glob.glob(os.path.join(workdir, 'bench.db*')):
+        os.remove(path)
+    shutil.rmtree(os.path.join(workdir, 'images'), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    cli()
@@ -0,0 +1,444 @@
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from benchmarks.report import summarize
+from benchmarks.scenarios import sample_image
+from benchmarks.seed import CATEGORIES, PASSWORD, WORDS, email
+
+
+def _rate(count, elapsed, unit):
+    return {'throughput': round(count / elapsed, 2) if elapsed else None, 'unit': unit, 'requests': count,
+            'errors': 0}
+
+
+def match_rebuild(app):
+    """Recomputes the grid cells and matches of every item, the work of 'flask items rebuild-matches'."""
+    from lostandfound.matching import rebuild_matches
+    from lostandfound.models import Item
+
+    with app.app_context():
+        items = Item.query.count()
+        start = time.perf_counter()
+        rebuild_matches()
+        return {'match_rebuild': _rate(items, time.perf_counter() - start, 'items/s')}
+
+
+def match_insert(app, context, requests=100, seed=1):
+    """
+    Latency and SQL statements of reporting a lost and a found item (POST
+    /items) with their matches updated, drawn like the seeded items. Run
+    with several --items to see it follows the size of a block, not of the
+    catalogue.
+    """
+    from utils.queries import QueryCounter
+
+    rnd = random.Random(seed)
+    client = app.test_client()
+    results = {}
+    for status in ('lost', 'found'):
+        latencies = []
+        errors = 0
+        with QueryCounter() as queries:
+            for _ in range(requests):
+                category = rnd.choice(CATEGORIES)
+                item = {'status': status, 'category': category, 'latitude': 38.7 + rnd.random() * 0.2,
+                        'longitude': -9.2 + rnd.random() * 0.2,
+                        'occurred_on': '2026-{:02d}-{:02d}'.format(rnd.randrange(1, 10), rnd.randrange(1, 29)),
+                        'description': '{} {}'.format(' '.join(rnd.sample(WORDS, 3)), category)}
+                start = time.perf_counter()
+                response = client.post('/items', headers=context.auth(), json=item)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 201
+        result = summarize(latencies, errors, sum(latencies))
+        result['queries'] = round(queries.count / requests, 2)
+        results['match_insert.' + status] = result
+    return results
+
+
+def serializer(app, rows=1000, rounds=5):
+    """Rows per second of the compiled serializer against marshmallow's ``dump``."""
+    from lostandfound.models import Item
+    from lostandfound.schemas import items_schema
+    from users.models import User
+    from users.schemas import users_schema
+    from utils.serializer import dump
+
+    results = {}
+    with app.test_request_context():
+        for name, schema, model in (('users', users_schema, User), ('items', items_schema, Item)):
+            objects = model.query.limit(rows).all()
+            if not objects:
+                continue
+            for variant, function in (('compiled', lambda: dump(schema, objects)),
+                                      ('marshmallow', lambda: schema.dump(objects))):
+                function()
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    function()
+                results['serializer.{}.{}'.format(name, variant)] = _rate(
+                    len(objects) * rounds, time.perf_counter() - start, 'rows/s')
+    return results
+
+
+def search(app, requests=200):
+    """Latency of a description search with SQLite FTS5 (ranked by BM25) against LIKE filters on every word."""
+    from lostandfound.models import Item
+    from lostandfound.search import item_fts, search_items
+
+    texts = ['{} {}'.format(first, second) for first, second in zip(WORDS, WORDS[1:] + WORDS[:1])]
+    variants = (
+        ('fts5', lambda text: search_items(Item.query.filter_by(active=True), text).order_by(item_fts.c.rank)),
+        ('like', lambda text: Item.query.filter_by(active=True).filter(
+            *[Item.description.like('%{}%'.format(word)) for word in text.split()]).order_by(Item.occurred_on.desc())),
+    )
+    results = {}
+    with app.app_context():
+        if not Item.query.first():
+            return results
+        for name, build in variants:
+            latencies = []
+            for number in range(requests):
+                query = build(texts[number % len(texts)]).limit(20)
+                start = time.perf_counter()
+                query.all()
+                latencies.append(time.perf_counter() - start)
+            results['search.' + name] = summarize(latencies, 0, sum(latencies), 'queries/s')
+    return results
+
+
+def import_users(app, rows=200):
+    """Rows per second of the bulk importer, password hashing included."""
+    from users.importer import import_users as run_import
+
+    users = [{'email': 'import{}-{}@bench.test'.format(os.getpid(), number), 'name': 'Imported',
+              'password': PASSWORD, 'role': 'regular'} for number in range(rows)]
+    with app.app_context():
+        start = time.perf_counter()
+        report = run_import(users, batch_size=app.config.get('IMPORT_BATCH_SIZE', 500))
+        result = _rate(report['imported'], time.perf_counter() - start, 'rows/s')
+    result['errors'] = len(report['errors'])
+    return {'import_users': result}
+
+
+def login_throughput(app, duration=5, threads=None):
+    """
+    Logins per second from as many concurrent clients as cores (or
+    ``threads``), password checks included. ``per_core`` divides the
+    throughput by the number of cores.
+    """
+    threads = threads or os.cpu_count()
+    stop = time.perf_counter() + duration
+
+    def worker(number):
+        client = app.test_client()
+        latencies, errors = [], 0
+        credentials = {'email': email(number), 'password': PASSWORD}
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = client.post('/auth/login', json=credentials)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        runs = list(pool.map(worker, range(threads)))
+    result = summarize([latency for latencies, _ in runs for latency in latencies], sum(errors for _, errors in runs),
+                       time.perf_counter() - started, 'logins/s')
+    result['per_core'] = round(result['throughput'] / os.cpu_count(), 2)
+    return {'login_throughput': result}
+
+
+def derivatives(app, images=20):
+    """Images per second made into every derivative size by a pool of ``IMAGE_DERIVATIVE_WORKERS`` processes."""
+    from lostandfound.derivatives import generate_derivatives
+    from lostandfound.images import image_path
+
+    sizes = app.config.get('IMAGE_DERIVATIVE_SIZES', {})
+    if not sizes:
+        return {}
+    with tempfile.TemporaryDirectory() as directory:
+        names = []
+        for number in range(images):
+            content = sample_image(1600, 1200) + number.to_bytes(4, 'big')
+            name = '{}.jpg'.format(hashlib.sha256(content).hexdigest())
+            path = image_path(directory, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            names.append(name)
+        workers = app.config.get('IMAGE_DERIVATIVE_WORKERS') or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Start the workers before timing
+            list(pool.map(abs, range(workers)))
+            start = time.perf_counter()
+            list(pool.map(generate_derivatives, [directory] * images, names, [sizes] * images))
+            elapsed = time.perf_counter() - start
+    return {'derivatives': _rate(images, elapsed, 'images/s')}
+
+
+def upload_memory(app, context, size=None):
+    """
+    Peak Python memory allocated while uploading an image of ``size`` bytes
+    (``IMAGE_MAX_SIZE`` by default), which should not grow with the size.
+    """
+    size = size or app.config.get('IMAGE_MAX_SIZE', 10 * 1024 * 1024)
+    client = app.test_client()
+    with tempfile.TemporaryFile() as body:
+        body.write(b'\xff\xd8\xff\xe0' + os.urandom(16))
+        body.truncate(size)
+        body.seek(0)
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            response = client.put('/items/{}/image'.format(context.lost_item_ids[0]), input_stream=body,
+                                  content_length=size, content_type='image/jpeg', headers=context.auth())
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    result = _rate(size / 1024 / 1024, elapsed, 'MB/s')
+    result.update(requests=1, errors=int(response.status_code != 200), peak_kb=peak // 1024)
+    return {'upload_memory': result}
+
+
+def export_memory(app, context):
+    """
+    Peak Python memory allocated while streaming the NDJSON export of every
+    user, read chunk by chunk like a client would. It should not grow with
+    the number of users.
+    """
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        response = client.get('/users/export', headers=dict(context.auth(), **{'Accept-Encoding': 'identity'}))
+        lines = 0
+        for chunk in response.response:
+            lines += chunk.count(b'\n') if isinstance(chunk, bytes) else chunk.count('\n')
+        response.close()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result = _rate(lines, elapsed, 'rows/s')
+    result.update(errors=int(response.status_code != 200), peak_kb=peak // 1024)
+    return {'export_memory': result}
+
+
+def rate_limiter(app, context, requests=500):
+    """
+    Latency of an authenticated read (GET /items?per_page=1) without rate
+    limits and with a default limit per identity on each backend: the
+    before_request hook, the JWT decode, the bucket update and the headers.
+    """
+    from app import db
+    from utils.models import RateLimit
+    from utils.ratelimit import DatabaseRateLimitBackend, Limit, MemoryRateLimitBackend, RateLimiterState
+
+    client = app.test_client()
+    limit = Limit.parse('1000000/second')
+    results = {}
+    previous = app.extensions.get('rate_limiter')
+    if previous is None:
+        return results
+    try:
+        for name, state in (('off', RateLimiterState(MemoryRateLimitBackend(300))),
+                            ('memory', RateLimiterState(MemoryRateLimitBackend(300), limit)),
+                            ('database', RateLimiterState(DatabaseRateLimitBackend(db, RateLimit, 300), limit))):
+            app.extensions['rate_limiter'] = state
+            client.get('/items?per_page=1', headers=context.auth())
+            latencies = []
+            errors = 0
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.get('/items?per_page=1', headers=context.auth())
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200 or (name != 'off') != ('RateLimit-Limit' in response.headers)
+            results['rate_limiter.' + name] = summarize(latencies, errors, sum(latencies))
+    finally:
+        app.extensions['rate_limiter'] = previous
+    return results
+
+
+def revocation(app, revoked=1000000, checks=2000):
+    """
+    Cost of a revocation lookup with each backend once ``revoked`` tokens
+    are revoked, for revoked and valid tokens alike.
+    """
+    from app import db
+    from auth.models import RevokedToken
+    from auth.revocation import DatabaseRevocationBackend, MemoryRevocationBackend
+
+    # Far enough in the future that nothing is purged during the run, and only these rows are deleted after it
+    expires_on = int(time.time()) + 10 ** 7
+    jtis = ['{:036x}'.format(number) for number in range(revoked)]
+    results = {}
+    with app.app_context():
+        memory = MemoryRevocationBackend()
+        for jti in jtis:
+            memory.revoke(jti, expires_on)
+        for start in range(0, revoked, 10000):
+            db.session.bulk_insert_mappings(RevokedToken, [{'jti': jti, 'expires_on': expires_on}
+                                                           for jti in jtis[start:start + 10000]])
+        db.session.commit()
+        try:
+            database = DatabaseRevocationBackend(db, RevokedToken, 10 ** 7)
+            for name, backend in (('memory', memory), ('database', database)):
+                for kind, offset in (('revoked', 0), ('valid', revoked)):
+                    latencies = []
+                    errors = 0
+                    for number in range(checks):
+                        jti = '{:036x}'.format((number * 7919) % revoked + offset)
+                        start = time.perf_counter()
+                        errors += backend.is_revoked(jti) != (kind == 'revoked')
+                        latencies.append(time.perf_counter() - start)
+                    results['revocation.{}.{}'.format(name, kind)] = summarize(latencies, errors, sum(latencies),
+                                                                               'checks/s')
+        finally:
+            RevokedToken.query.filter_by(expires_on=expires_on).delete()
+            db.session.commit()
+    return results
+
+
+def role_check(app, context, requests=500):
+    """
+    Latency of an admin endpoint (/users/data) authorized from the role claim
+    of the token, from the cached user and from the user loaded from the
+    database on every request, with the SQL statements each one runs.
+    """
+    from app import user_cache
+    from utils.queries import QueryCounter
+
+    client = app.test_client()
+    results = {}
+    role_claims = app.config.get('JWT_ROLE_CLAIMS', False)
+    try:
+        for variant, claims, cached in (('claims', True, True), ('cached_user', False, True),
+                                        ('database', False, False)):
+            app.config['JWT_ROLE_CLAIMS'] = claims
+            token = client.post('/auth/login', json={'email': email(0), 'password': PASSWORD}).get_json()['access_token']
+            latencies = []
+            errors = 0
+            with QueryCounter() as queries:
+                for _ in range(requests):
+                    if not cached:
+                        user_cache.cache.clear()
+                    start = time.perf_counter()
+                    response = client.get('/users/data', headers=context.auth(token))
+                    latencies.append(time.perf_counter() - start)
+                    errors += response.status_code != 200
+            result = summarize(latencies, errors, sum(latencies))
+            result['queries'] = round(queries.count / requests, 2)
+            results['role_check.' + variant] = result
+    finally:
+        app.config['JWT_ROLE_CLAIMS'] = role_claims
+    return results
+
+
+def user_cache(app, context, requests=500):
+    """
+    Latency of an authenticated read (GET /items/<id>) with the user served
+    from ``UserCache`` and loaded from the database on every request, with
+    the SQL statements each one runs.
+    """
+    from app import user_cache as cache
+    from utils.queries import QueryCounter
+
+    client = app.test_client()
+    token = client.post('/auth/login', json={'email': email(1), 'password': PASSWORD}).get_json()['access_token']
+    path = '/items/{}'.format(context.lost_item_ids[0]) if context.lost_item_ids else '/items?per_page=1'
+    results = {}
+    for variant, cached in (('cached', True), ('uncached', False)):
+        client.get(path, headers=context.auth(token))
+        latencies = []
+        errors = 0
+        with QueryCounter() as queries:
+            for _ in range(requests):
+                if not cached:
+                    cache.cache.clear()
+                start = time.perf_counter()
+                response = client.get(path, headers=context.auth(token))
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+        result = summarize(latencies, errors, sum(latencies))
+        result['queries'] = round(queries.count / requests, 2)
+        results['user_cache.' + variant] = result
+    return results
+
+
+def compression(app, context, requests=50):
+    """
+    Response size and latency of the list endpoints without compression and
+    with each encoding, and the CPU time spent compressing their body.
+    """
+    import zlib
+
+    from utils.compression import ENCODINGS
+
+    client = app.test_client()
+    results = {}
+    endpoints = (('list_users', '/users?per_page=100'), ('list_items', '/items?per_page=100'),
+                 ('export_users', '/users/export'))
+    for name, path in endpoints:
+        for encoding in ('identity', 'gzip', 'deflate'):
+            headers = dict(context.auth(), **{'Accept-Encoding': encoding})
+            latencies = []
+            errors = 0
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.get(path, headers=headers)
+                body = response.get_data()
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+            result = summarize(latencies, errors, sum(latencies))
+            result['bytes'] = len(body)
+            if encoding != 'identity':
+                plain = client.get(path, headers=dict(context.auth(), **{'Accept-Encoding': 'identity'})).get_data()
+                start = time.perf_counter()
+                for _ in range(requests):
+                    compressor = zlib.compressobj(app.config.get('COMPRESS_LEVEL', 6), zlib.DEFLATED,
+                                                  ENCODINGS[encoding])
+                    compressor.compress(plain) + compressor.flush()
+                result['compress_ms'] = round((time.perf_counter() - start) / requests * 1000, 3)
+            results['compression.{}.{}'.format(name, encoding)] = result
+    return results
+
+
+def sqlite_contention(app, context, duration=5, readers=8, writers=4):
+    """Reads and writes per second from concurrent threads sharing the SQLite database."""
+    latencies = {'reads': [], 'writes': []}
+    errors = {'reads': 0, 'writes': 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def worker(kind):
+        client = app.test_client()
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            if kind == 'writes':
+                response = client.post('/items', headers=context.auth(), json={
+                    'status': 'found', 'category': 'keys', 'occurred_on': '2026-02-01', 'description': 'keys'})
+                failed = response.status_code != 201
+            else:
+                response = client.get('/items?per_page=20', headers=context.auth())
+                failed = response.status_code != 200
+            latency = time.perf_counter() - start
+            with lock:
+                latencies[kind].append(latency)
+                errors[kind] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=('writes',)) for _ in range(writers)] + \
+              [threading.Thread(target=worker, args=('reads',)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {'sqlite_contention.' + kind: summarize(latencies[kind], errors[kind], elapsed) for kind in latencies}
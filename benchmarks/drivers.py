@@ -0,0 +1,97 @@
+import http.client
+import json
+import logging
+import multiprocessing
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.report import summarize
+
+
+def run_inprocess(app, scenario, context, requests, warmup=5):
+    """Sends ``requests`` requests of ``scenario`` one after the other through the Flask test client."""
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    for number in range(warmup + requests):
+        method, path, headers, body = scenario.build(context, number)
+        start = time.perf_counter()
+        response = client.open(path, method=method, headers=headers, json=body)
+        response.get_data()
+        latency = time.perf_counter() - start
+        if number < warmup:
+            continue
+        latencies.append(latency)
+        if response.status_code != scenario.expect:
+            errors += 1
+    return summarize(latencies, errors, sum(latencies))
+
+
+def run_http(url, scenario, context, concurrency, duration, timeout=30):
+    """
+    Sends requests of ``scenario`` to the server at ``url`` from ``concurrency``
+    threads with a connection each, for ``duration`` seconds.
+    """
+    parts = urlsplit(url)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        number = 0
+        while time.perf_counter() < stop:
+            method, path, headers, body = scenario.build(context, number)
+            number += 1
+            if body is not None:
+                body = json.dumps(body).encode()
+                headers = dict(headers, **{'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                connection.request(method, parts.path.rstrip('/') + path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = None
+            latency = time.perf_counter() - start
+            with lock:
+                latencies.append(latency)
+                if status != scenario.expect:
+                    errors[0] += 1
+        connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def start_server(config):
+    """
+    Serves a fresh app with the ``config`` overrides from a child process,
+    on a free local port, with the threaded Werkzeug server. Returns the
+    process and the server URL.
+    """
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    process = context.Process(target=_serve, args=(config, ports), daemon=True)
+    process.start()
+    return process, 'http://127.0.0.1:{}'.format(ports.get(timeout=60))
+
+
+def _serve(config, ports):
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, create_app(**config), threaded=True)
+    ports.put(server.server_port)
+    server.serve_forever()
@@ -0,0 +1,95 @@
+import json
+import math
+import platform
+import sqlite3
+import time
+
+# Metrics compared with the baseline and whether a higher value is better
+COMPARED = {'throughput': True, 'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'peak_kb': False, 'bytes': False,
+            'compress_ms': False, 'queries': False}
+
+
+def percentile(ordered, fraction):
+    """Nearest rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(latencies, errors, elapsed, unit='req/s'):
+    """Throughput and latency percentiles (in milliseconds) of a run that took ``elapsed`` seconds."""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput': round(len(ordered) / elapsed, 2) if elapsed else None,
+        'unit': unit,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None,
+        'p50_ms': _ms(percentile(ordered, 0.50)),
+        'p95_ms': _ms(percentile(ordered, 0.95)),
+        'p99_ms': _ms(percentile(ordered, 0.99)),
+    }
+
+
+def new_report(options):
+    return {
+        'created_on': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'options': options,
+        'results': {},
+    }
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(report, path):
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def compare(report, baseline, threshold):
+    """
+    Regressions of ``report`` against ``baseline``: every compared metric of a
+    result present in both that got worse by more than ``threshold`` (0.1 is
+    10%), plus results that failed requests the baseline didn't. Returns a list
+    of messages, empty when nothing regressed.
+    """
+    regressions = []
+    for name, result in sorted(report['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        if result.get('errors') and not base.get('errors'):
+            regressions.append('{}: {} failed requests'.format(name, result['errors']))
+        for metric, higher_is_better in COMPARED.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append('{}: {} {} -> {} ({:+.1%})'.format(name, metric, old, new, change))
+    return regressions
+
+
+def format_table(report):
+    row = '{:<42} {:>20} {:>10} {:>10} {:>10} {:>8} {:>9} {:>7}'
+    lines = [row.format('benchmark', 'throughput', 'p50 ms', 'p95 ms', 'p99 ms', 'peak KB', 'bytes', 'errors')]
+    for name, result in sorted(report['results'].items()):
+        lines.append(row.format(name, '{} {}'.format(result.get('throughput'), result.get('unit', '')),
+                                _text(result.get('p50_ms')), _text(result.get('p95_ms')), _text(result.get('p99_ms')),
+                                _text(result.get('peak_kb')), _text(result.get('bytes')), result.get('errors', 0)))
+    return '\n'.join(lines)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def _text(value):
+    return '-' if value is None else value
@@ -0,0 +1,152 @@
+import io
+import itertools
+import random
+
+from benchmarks.seed import PASSWORD, email
+
+
+class Scenario:
+    """
+    One kind of API request. ``build(context, number)`` returns the
+    ``(method, path, headers, json)`` of the request number ``number``;
+    responses with another status than ``expect`` count as errors.
+    """
+
+    def __init__(self, name, build, expect=200, writes=False):
+        self.name = name
+        self.build = build
+        self.expect = expect
+        self.writes = writes
+
+
+class Context:
+    """Tokens, ids and validators the scenarios build their requests from, made by ``prepare``."""
+
+    def __init__(self, users, items, seed=1):
+        self.users = users
+        self.items = items
+        self.random = random.Random(seed)
+        self.sequence = itertools.count()
+        self.admin_token = None
+        self.refresh_token = None
+        self.users_etag = None
+        self.deep_page = None
+        self.deep_cursor = None
+        self.lost_item_ids = []
+        self.image_url = None
+        self.thumbnail_url = None
+
+    def auth(self, token=None):
+        return {'Authorization': 'Bearer ' + (token or self.admin_token)}
+
+    def user_id(self):
+        return self.random.randrange(1, self.users + 1)
+
+    def item_id(self):
+        return self.random.randrange(1, self.items + 1)
+
+
+def prepare(app, context, per_page=20):
+    """Logs in as the admin and looks up what the scenarios need, through the app itself."""
+    from lostandfound.models import Item, ItemStatus
+    from users.models import User
+    from utils.pagination import encode_cursor
+
+    client = app.test_client()
+    tokens = client.post('/auth/login', json={'email': email(0), 'password': PASSWORD}).get_json()
+    context.admin_token = tokens['access_token']
+    context.refresh_token = tokens['refresh_token']
+    context.users_etag = client.get('/users?per_page={}&count=true'.format(per_page), headers=context.auth()).headers['ETag']
+    with app.app_context():
+        # Half way through the list, where offset pagination hurts the most
+        context.deep_page = max(context.users // per_page // 2, 1)
+        row = User.query.filter_by(active=True).order_by(User.name, User.id) \
+            .offset((context.deep_page - 1) * per_page - 1).first() if context.deep_page > 1 else None
+        context.deep_cursor = encode_cursor([row.name, row.id]) if row else None
+        context.lost_item_ids = [item_id for item_id, in Item.query.with_entities(Item.id)
+                                 .filter_by(status=ItemStatus.lost, active=True).limit(1000)]
+    if context.items:
+        response = client.put('/items/{}/image'.format(context.lost_item_ids[0]), data=sample_image(),
+                              content_type='image/jpeg', headers=context.auth())
+        item = response.get_json()
+        context.image_url = item['image']
+        context.thumbnail_url = min(item['thumbnails'].values())
+        # Made on the spot, so the derivative scenario only reads it
+        client.get(context.thumbnail_url)
+    return context
+
+
+def sample_image(width=800, height=600):
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 120, 40)).save(output, 'JPEG')
+    return output.getvalue()
+
+
+def _users_page(context, number):
+    return 'GET', '/users?per_page=20', context.auth(), None
+
+
+def _users_count(context, number):
+    return 'GET', '/users?per_page=20&count=true', context.auth(), None
+
+
+def _users_offset(context, number):
+    return 'GET', '/users?per_page=20&page={}'.format(context.deep_page), context.auth(), None
+
+
+def _users_keyset(context, number):
+    cursor = '&cursor=' + context.deep_cursor if context.deep_cursor else ''
+    return 'GET', '/users?per_page=20' + cursor, context.auth(), None
+
+
+def _users_not_modified(context, number):
+    return 'GET', '/users?per_page=20&count=true', dict(context.auth(), **{'If-None-Match': context.users_etag}), None
+
+
+def _register(context, number):
+    serial = next(context.sequence)
+    user = {'email': 'new{}-{}@bench.test'.format(context.random.getrandbits(32), serial), 'name': 'New',
+            'password': PASSWORD, 'role': 'regular'}
+    return 'POST', '/users', {}, user
+
+
+def _create_item(context, number):
+    item = {'status': context.random.choice(['lost', 'found']), 'category': 'wallet', 'occurred_on': '2026-03-01',
+            'description': 'black leather wallet', 'latitude': 38.75, 'longitude': -9.15}
+    return 'POST', '/items', context.auth(), item
+
+
+SCENARIOS = [
+    Scenario('login', lambda context, number: (
+        'POST', '/auth/login', {}, {'email': email(context.user_id() - 1), 'password': PASSWORD})),
+    Scenario('refresh', lambda context, number: (
+        'POST', '/auth/refresh', context.auth(context.refresh_token), None)),
+    Scenario('list_users', _users_page),
+    Scenario('list_users_count', _users_count),
+    Scenario('list_users_not_modified', _users_not_modified, expect=304),
+    Scenario('list_users_offset', _users_offset),
+    Scenario('list_users_keyset', _users_keyset),
+    Scenario('get_user', lambda context, number: ('GET', '/users/{}'.format(context.user_id()), context.auth(), None)),
+    Scenario('users_data', lambda context, number: ('GET', '/users/data', context.auth(), None)),
+    Scenario('export_users', lambda context, number: ('GET', '/users/export', context.auth(), None)),
+    Scenario('spec', lambda context, number: ('GET', '/doc/spec', {}, None)),
+    Scenario('list_items', lambda context, number: (
+        'GET', '/items?status=lost&category=wallet', context.auth(), None)),
+    Scenario('search_items', lambda context, number: ('GET', '/items?q=black+leather', context.auth(), None)),
+    Scenario('get_item', lambda context, number: ('GET', '/items/{}'.format(context.item_id()), context.auth(), None)),
+    Scenario('item_matches', lambda context, number: (
+        'GET', '/items/{}/matches'.format(context.random.choice(context.lost_item_ids)), context.auth(), None)),
+    Scenario('get_image', lambda context, number: ('GET', context.image_url, {}, None)),
+    Scenario('get_thumbnail', lambda context, number: ('GET', context.thumbnail_url, {}, None)),
+    Scenario('register', _register, expect=201, writes=True),
+    Scenario('create_item', _create_item, expect=201, writes=True),
+]
+ITEM_SCENARIOS = {'list_items', 'search_items', 'get_item', 'item_matches', 'get_image', 'get_thumbnail', 'create_item'}
+
+
+def select(names=None, items=True):
+    """The scenarios named in ``names`` (all by default), leaving out the item ones without items."""
+    return [scenario for scenario in SCENARIOS if (not names or scenario.name in names)
+            and (items or scenario.name not in ITEM_SCENARIOS)]
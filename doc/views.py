@@ -1,12 +1,88 @@
-from flask import Blueprint, jsonify, current_app
+import hashlib
+import json
+import os
+
+from flask import Blueprint, current_app, jsonify
 from flask_swagger import swagger
 
+from utils.conditional import not_modified, set_validators
+
 doc_app = Blueprint('doc_app', __name__, url_prefix='/doc')
 
+# Top level vendor extension of the spec holding the source_hash it was generated from
+SOURCE_HASH_KEY = 'x-source-hash'
 
-@doc_app.route("/spec")
-def spec():
-    swag = swagger(current_app)
+
+def build_spec(app):
+    swag = swagger(app)
     swag['info']['version'] = "1.0"
     swag['info']['title'] = "LostAndFound"
-    return jsonify(swag)
+    swag[SOURCE_HASH_KEY] = source_hash(app)
+    return swag
+
+
+def source_hash(app):
+    """Hash of what the spec is generated from: the routes and the docstrings of their views."""
+    digest = hashlib.sha1()
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: (rule.rule, rule.endpoint)):
+        view = app.view_functions.get(rule.endpoint)
+        digest.update('{} {} {} {}\n'.format(rule.rule, sorted(rule.methods), rule.endpoint,
+                                              getattr(view, '__doc__', None)).encode())
+    return digest.hexdigest()
+
+
+def get_spec(app):
+    """
+    Returns the serialized spec and its ETag. The spec is generated (or read
+    from ``DOC_SPEC_FILE`` when it exists) once per process and kept in
+    ``app.extensions``, since generating it parses every view docstring.
+    A file generated from other routes or docstrings than the app's is
+    stale: it is ignored with a warning and the spec is generated.
+    """
+    cached = app.extensions.get('doc_spec')
+    if cached is None:
+        body = _read_spec_file(app)
+        if body is None:
+            body = _render_spec(app)
+        cached = app.extensions['doc_spec'] = (body, hashlib.sha1(body).hexdigest())
+    return cached
+
+
+def write_spec(app, path):
+    with open(path, 'wb') as f:
+        f.write(_render_spec(app))
+    app.extensions.pop('doc_spec', None)
+
+
+def _read_spec_file(app):
+    spec_file = app.config.get('DOC_SPEC_FILE')
+    if not spec_file or not os.path.exists(spec_file):
+        return None
+    with open(spec_file, 'rb') as f:
+        body = f.read()
+    try:
+        file_hash = json.loads(body).get(SOURCE_HASH_KEY)
+    except (ValueError, AttributeError):
+        file_hash = None
+    if file_hash != source_hash(app):
+        app.logger.warning("%s does not match the app's routes and docstrings, generating the spec instead. "
+                           "Run 'flask doc export-spec' to update it.", spec_file)
+        return None
+    return body
+
+
+def _render_spec(app):
+    with app.app_context():
+        return jsonify(build_spec(app)).get_data()
+
+
+@doc_app.route("/spec")
+def spec():
+    body, etag = get_spec(current_app._get_current_object())
+    # Also matches the ETag compression gave the gzip/deflate copy
+    response = not_modified(etag, None)
+    if response is None:
+        response = set_validators(current_app.response_class(body, mimetype='application/json'), etag, None)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('DOC_SPEC_MAX_AGE', 300)
+    return response
@@ -0,0 +1,143 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+from threading import Lock
+
+from PIL import Image
+from werkzeug.exceptions import ServiceUnavailable, UnsupportedMediaType
+
+from lostandfound.images import STORED_NAME, TEMP_PREFIX, image_path
+
+DERIVATIVES_DIRECTORY = '.derivatives'
+PIL_FORMATS = {'jpg': 'JPEG', 'png': 'PNG', 'gif': 'GIF', 'webp': 'WEBP'}
+
+
+def derivative_path(directory, size_name, name):
+    return image_path(Path(directory) / DERIVATIVES_DIRECTORY / size_name, name)
+
+
+def generate_derivatives(directory, name, sizes):
+    """
+    Writes the resized copies of the image ``name``, ``sizes`` mapping size
+    names to the longest side in pixels. Existing copies are kept. Runs in
+    the worker processes.
+    """
+    with Image.open(str(image_path(directory, name))) as original:
+        original.load()
+        for size_name, size in sizes.items():
+            path = derivative_path(directory, size_name, name)
+            if path.exists():
+                continue
+            image = original.copy()
+            image.thumbnail((size, size), Image.LANCZOS)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix=TEMP_PREFIX)
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    image.save(file, PIL_FORMATS[name.rsplit('.', 1)[1]])
+                os.replace(temp_path, str(path))
+            except Exception:
+                os.remove(temp_path)
+                raise
+
+
+class ImageDerivatives:
+    """
+    Resized copies of the item images (``IMAGE_DERIVATIVE_SIZES``), made in a
+    pool of ``IMAGE_DERIVATIVE_WORKERS`` processes. ``schedule`` queues them
+    right after an upload without waiting; ``get`` returns one, making it on
+    the spot if it is not on disk yet, so a lost job or a new size only costs
+    the first request.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.sizes = {}
+        self.workers = 0
+        self.queue_depth = 0
+        self.generated = 0
+        self.on_demand = 0
+        self.failed = 0
+        self._lock = Lock()
+        self._pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config['LOSTANDFOUND_IMAGES_FILE_PATH']
+        self.sizes = app.config.get('IMAGE_DERIVATIVE_SIZES', {})
+        self.workers = app.config.get('IMAGE_DERIVATIVE_WORKERS', 0)
+
+    def schedule(self, name):
+        if self.sizes:
+            self._submit(name, self.sizes)
+
+    def get(self, name, size_name):
+        """
+        Path of a derivative of the image ``name``, or ``None`` for unknown
+        sizes and images and for files Pillow can't read. Raises 415 for
+        images over Pillow's decompression bomb limit and 503 when a worker
+        died (the pool is replaced for the next requests).
+        """
+        if size_name not in self.sizes or not STORED_NAME.match(name) \
+                or not image_path(self.directory, name).exists():
+            return None
+        path = derivative_path(self.directory, size_name, name)
+        if not path.exists():
+            with self._lock:
+                self.on_demand += 1
+            try:
+                self._submit(name, {size_name: self.sizes[size_name]}).result()
+            except BrokenProcessPool:
+                raise ServiceUnavailable('The image workers are restarting, try again later.', retry_after=1)
+            except Image.DecompressionBombError:
+                raise UnsupportedMediaType('The image has too many pixels to be resized')
+            except OSError:
+                return None
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {'queue_depth': self.queue_depth, 'generated': self.generated,
+                    'on_demand': self.on_demand, 'failed': self.failed}
+
+    def _submit(self, name, sizes):
+        pool = self._get_pool()
+        try:
+            future = pool.submit(generate_derivatives, self.directory, name, sizes)
+        except BrokenProcessPool:
+            # A worker died since the last job, retry once on a new pool
+            self._discard_pool(pool)
+            pool = self._get_pool()
+            future = pool.submit(generate_derivatives, self.directory, name, sizes)
+        with self._lock:
+            self.queue_depth += 1
+        future.add_done_callback(partial(self._done, pool))
+        return future
+
+    def _done(self, pool, future):
+        with self._lock:
+            self.queue_depth -= 1
+            if future.exception() is None:
+                self.generated += 1
+            else:
+                self.failed += 1
+        if isinstance(future.exception(), BrokenProcessPool):
+            self._discard_pool(pool)
+
+    def _get_pool(self):
+        # Created on first use so every forked server worker gets its own pool
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers or os.cpu_count())
+            return self._pool
+
+    def _discard_pool(self, pool):
+        # A killed worker breaks the whole pool, the next job gets a new one
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from flask import current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.formparser import parse_form_data
+
+# Magic bytes of the accepted image formats, the declared content type is not trusted
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+SIGNATURE_LENGTH = 12
+
+# Images are named by the SHA-256 of their content and stored two directory
+# levels deep (ab/cd/abcd...), so no directory grows past a few hundred
+# entries even with millions of images
+IMAGE_NAME = re.compile(r'^[0-9a-f]{64}\.(jpg|png|gif|webp)$')
+# Content hash names and the random names older uploads were stored flat with
+STORED_NAME = re.compile(r'^([0-9a-f]{64}|[0-9a-f]{32})\.(jpg|png|gif|webp)$')
+TEMP_PREFIX = '.upload-'
+
+
+def image_path(directory, name):
+    """Path of the image ``name``. Names that are not content hashes are stored flat."""
+    if IMAGE_NAME.match(name):
+        return Path(directory) / name[:2] / name[2:4] / name
+    return Path(directory) / name
+
+
+def sniff_image(head):
+    """Returns the extension of the image format ``head`` starts with, or None."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageWriter:
+    """
+    File-like object streaming an upload into a temporary file next to the
+    images, checking the format from the first bytes and the size on every
+    write, so an upload is rejected as soon as it goes wrong and only one
+    chunk is ever held in memory. The content is hashed as it is written and
+    ``save`` moves the file to its content address, or drops it if the same
+    image is already stored.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.size = 0
+        self.extension = None
+        self._head = b''
+        self._hash = hashlib.sha256()
+        fd, self.temp_path = tempfile.mkstemp(dir=str(self.directory), prefix=TEMP_PREFIX)
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise RequestEntityTooLarge('The image is larger than {} bytes'.format(self.max_size))
+        if self.extension is None:
+            self._head += chunk[:SIGNATURE_LENGTH]
+            if len(self._head) >= SIGNATURE_LENGTH:
+                self._check_format()
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        return len(chunk)
+
+    def seek(self, *args):
+        # Werkzeug rewinds the stream it wrote a form file to, nothing to do
+        return 0
+
+    def save(self):
+        """Stores the upload at its content address and returns its file name."""
+        if self.extension is None:
+            self._check_format()
+        if self.size == 0:
+            raise UnsupportedMediaType('The image is empty')
+        name = '{}.{}'.format(self._hash.hexdigest(), self.extension)
+        path = image_path(self.directory, name)
+        if path.exists():
+            # Already stored, refresh its age so the garbage collector's grace period restarts
+            self.discard()
+            os.utime(str(path))
+            return name
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.temp_path, str(path))
+        return name
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def _check_format(self):
+        self.extension = sniff_image(self._head)
+        if self.extension is None:
+            raise UnsupportedMediaType('Only JPEG, PNG, GIF and WebP images are accepted')
+
+
+def save_upload(request):
+    """
+    Streams the image in ``request`` to disk and returns its file name. The
+    image is either the raw body or the ``image`` field of a
+    multipart/form-data body. Raises 413 or 415 HTTP exceptions.
+    """
+    config = current_app.config
+    max_size = config.get('IMAGE_MAX_SIZE', 10 * 1024 * 1024)
+    if request.content_length is not None and request.content_length > max_size + 64 * 1024:
+        raise RequestEntityTooLarge('The image is larger than {} bytes'.format(max_size))
+    writer = ImageWriter(config['LOSTANDFOUND_IMAGES_FILE_PATH'], max_size)
+    try:
+        if request.mimetype == 'multipart/form-data':
+            _, _, files = parse_form_data(request.environ, stream_factory=_single_file(writer), silent=False)
+            if 'image' not in files:
+                raise UnsupportedMediaType('Missing image field')
+        else:
+            chunk_size = config.get('IMAGE_CHUNK_SIZE', 64 * 1024)
+            for chunk in iter(lambda: request.stream.read(chunk_size), b''):
+                writer.write(chunk)
+        return writer.save()
+    except Exception:
+        writer.discard()
+        raise
+
+
+def _single_file(writer):
+    streams = iter([writer])
+
+    def stream_factory(*args, **kwargs):
+        for stream in streams:
+            return stream
+        raise UnsupportedMediaType('Only one image can be uploaded')
+    return stream_factory
+
+
+def image_references():
+    """Reference count of every stored image, from the item rows using it."""
+    # Imported here, the derivatives extension imports this module while the app module loads
+    from sqlalchemy import func
+    from app import db
+    from lostandfound.models import Item
+    query = db.session.query(Item.image, func.count()).filter(Item.image.isnot(None)).group_by(Item.image)
+    return dict(query.all())
+
+
+def collect_garbage(referenced, grace_period):
+    """
+    Deletes the stored images whose names are not in ``referenced`` and
+    abandoned temporary uploads, if they were not written or uploaded again in
+    the last ``grace_period`` seconds. The grace period covers uploads whose
+    item was not committed yet. Returns the number of files deleted.
+    """
+    directory = current_app.config['LOSTANDFOUND_IMAGES_FILE_PATH']
+    deadline = time.time() - grace_period
+    deleted = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name in referenced:
+                continue
+            if not (STORED_NAME.match(name) or name.startswith(TEMP_PREFIX)):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getmtime(path) < deadline:
+                os.remove(path)
+                deleted += 1
+    return deleted
@@ -0,0 +1,168 @@
+import math
+import re
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from lostandfound.models import Item, ItemStatus, Match
+
+# Size of the cells items are bucketed in for candidate blocking, ~1.1 km of latitude.
+# Changing it requires recomputing Item.grid_cell ('flask items rebuild-matches').
+GRID_CELL_DEGREES = 0.01
+
+TEXT_WEIGHT = 0.5
+DISTANCE_WEIGHT = 0.3
+TIME_WEIGHT = 0.2
+
+
+def grid_cell(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return '{}:{}'.format(math.floor(latitude / GRID_CELL_DEGREES), math.floor(longitude / GRID_CELL_DEGREES))
+
+
+def neighbour_cells(cell):
+    row, col = (int(part) for part in cell.split(':'))
+    return ['{}:{}'.format(row + d_row, col + d_col) for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)]
+
+
+@db.event.listens_for(Item, 'before_insert')
+@db.event.listens_for(Item, 'before_update')
+def set_grid_cell(mapper, connection, target):
+    target.grid_cell = grid_cell(target.latitude, target.longitude)
+
+
+def update_matches(item):
+    """
+    Recomputes the matches of ``item``. Every lost item keeps its best
+    ``MATCH_MAX_RESULTS`` found items, like ``rebuild_matches`` computes them.
+    Candidates are blocked by category, time window and the 3x3 grid cells
+    around the item (plus the items without a location), so the cost
+    depends on the size of the block, not of the catalogue. Blocks larger
+    than ``MATCH_CANDIDATE_LIMIT`` keep the candidates closest in time.
+    Must run inside the transaction that saved the item.
+
+    A lost item is scored against its block. A found item is offered to the
+    lost items of its block, taking the place of their worst match when it
+    scores better; the lost items it matched before are recomputed. Only in
+    blocks over the limit can this differ from a rebuild, since the found
+    item's block then may not hold every lost item whose block holds it.
+    """
+    previous = [lost_item_id for lost_item_id, in
+                db.session.query(Match.lost_item_id).filter_by(found_item_id=item.id)]
+    Match.query.filter((Match.lost_item_id == item.id) | (Match.found_item_id == item.id)) \
+        .delete(synchronize_session=False)
+    if previous:
+        # Lost items that matched it before may now have room for another found item
+        for lost_item in Item.query.filter(Item.id.in_(previous)):
+            _match_lost_item(lost_item)
+    if not item.active:
+        return []
+    if item.status == ItemStatus.lost:
+        return _match_lost_item(item)
+    return _offer_found_item(item, set(previous))
+
+
+def _match_lost_item(item):
+    Match.query.filter_by(lost_item_id=item.id).delete(synchronize_session=False)
+    scored = list(_scored_candidates(item, _words(item.description)))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    matches = [Match(lost_item_id=item.id, found_item_id=candidate.id, score=score)
+               for score, candidate in scored[:current_app.config.get('MATCH_MAX_RESULTS', 20)]]
+    db.session.add_all(matches)
+    return matches
+
+
+def _offer_found_item(item, recomputed):
+    max_results = current_app.config.get('MATCH_MAX_RESULTS', 20)
+    scored = [(score, lost_item) for score, lost_item in _scored_candidates(item, _words(item.description))
+              if lost_item.id not in recomputed]
+    current = {}
+    if scored:
+        for match in Match.query.filter(Match.lost_item_id.in_([lost_item.id for _, lost_item in scored])):
+            current.setdefault(match.lost_item_id, []).append(match)
+    matches = []
+    for score, lost_item in scored:
+        kept = current.get(lost_item.id, [])
+        if len(kept) >= max_results:
+            worst = min(kept, key=lambda match: match.score)
+            if score <= worst.score:
+                continue
+            db.session.delete(worst)
+        matches.append(Match(lost_item_id=lost_item.id, found_item_id=item.id, score=score))
+    db.session.add_all(matches)
+    return matches
+
+
+def _scored_candidates(item, words):
+    """``(score, candidate)`` of the items of the opposite status in the block of ``item`` scoring enough."""
+    config = current_app.config
+    window = timedelta(days=config.get('MATCH_WINDOW_DAYS', 30))
+    slack = timedelta(days=config.get('MATCH_SLACK_DAYS', 1))
+    lost = item.status == ItemStatus.lost
+    query = Item.query.filter_by(active=True,
+                                 status=ItemStatus.found if lost else ItemStatus.lost,
+                                 category=item.category)
+    if lost:
+        query = query.filter(Item.occurred_on.between(item.occurred_on - slack, item.occurred_on + window))
+    else:
+        query = query.filter(Item.occurred_on.between(item.occurred_on - window, item.occurred_on + slack))
+    limit = config.get('MATCH_CANDIDATE_LIMIT', 500)
+    # Closest in time first, so a dense block drops the worst candidates and not arbitrary ones
+    query = query.order_by(func.abs(func.julianday(Item.occurred_on) - func.julianday(item.occurred_on)), Item.id)
+    cell = grid_cell(item.latitude, item.longitude)
+    if cell:
+        candidates = query.filter(Item.grid_cell.in_(neighbour_cells(cell))).limit(limit).all()
+        candidates += query.filter(Item.grid_cell.is_(None)).limit(limit).all()
+    else:
+        candidates = query.limit(limit).all()
+
+    min_score = config.get('MATCH_MIN_SCORE', 0.3)
+    for candidate in candidates:
+        score = round(_score(item, words, candidate, window), 4)
+        if score >= min_score:
+            yield score, candidate
+
+
+def rebuild_matches(batch_size=1000):
+    """Recomputes grid cells and matches of every item, for backfills."""
+    Match.query.delete()
+    last_id = 0
+    while True:
+        items = Item.query.filter(Item.id > last_id).order_by(Item.id).limit(batch_size).all()
+        if not items:
+            break
+        for item in items:
+            item.grid_cell = grid_cell(item.latitude, item.longitude)
+        db.session.flush()
+        for item in items:
+            if item.status == ItemStatus.lost and item.active:
+                _match_lost_item(item)
+        db.session.commit()
+        last_id = items[-1].id
+
+
+def _score(item, words, candidate, window):
+    candidate_words = _words(candidate.description)
+    union = words | candidate_words
+    text = len(words & candidate_words) / len(union) if union else 0
+    if item.latitude is None or candidate.latitude is None:
+        distance = 0.5
+    else:
+        max_km = 3 * GRID_CELL_DEGREES * 111
+        distance = max(0.0, 1 - _distance_km(item, candidate) / max_km)
+    elapsed = abs((item.occurred_on - candidate.occurred_on).total_seconds())
+    time = max(0.0, 1 - elapsed / window.total_seconds())
+    return TEXT_WEIGHT * text + DISTANCE_WEIGHT * distance + TIME_WEIGHT * time
+
+
+def _words(text):
+    return set(word for word in re.findall(r'\w+', (text or '').lower()) if len(word) > 2)
+
+
+def _distance_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (a.latitude, a.longitude, b.latitude, b.longitude))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(h))
@@ -1,6 +1,56 @@
 from datetime import datetime
+from enum import Enum
 
 from sqlalchemy import Index, func, select, and_
 from sqlalchemy.ext.hybrid import hybrid_property
 
 from app import db
+from utils.models import BaseModel
+
+
+class ItemStatus(Enum):
+    lost = 'lost'
+    found = 'found'
+
+
+class Item(BaseModel):
+    __table_args__ = (
+        # Search shapes: by status and category, by status only, by date only and by area,
+        # always newest first with id as tie breaker for keyset pagination
+        Index('ix_item_active_status_category_occurred_on_id', 'active', 'status', 'category', 'occurred_on', 'id'),
+        Index('ix_item_active_status_occurred_on_id', 'active', 'status', 'occurred_on', 'id'),
+        Index('ix_item_active_occurred_on_id', 'active', 'occurred_on', 'id'),
+        Index('ix_item_active_latitude_longitude', 'active', 'latitude', 'longitude'),
+        # Candidate blocking for the matching engine
+        Index('ix_item_active_status_category_grid_cell_occurred_on', 'active', 'status', 'category', 'grid_cell',
+              'occurred_on'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.Enum(ItemStatus), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    occurred_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    description = db.Column(db.Text, nullable=False, default='')
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    grid_cell = db.Column(db.String(32), nullable=True)
+    image = db.Column(db.String(80), nullable=True, index=True)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+
+
+class Match(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('lost_item_id', 'found_item_id'),
+        Index('ix_match_lost_item_id_score', 'lost_item_id', 'score'),
+        Index('ix_match_found_item_id_score', 'found_item_id', 'score'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    lost_item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
+    found_item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    created_on = db.Column(db.DateTime, default=db.func.now())
+
+    lost_item = db.relationship('Item', foreign_keys=[lost_item_id])
+    found_item = db.relationship('Item', foreign_keys=[found_item_id])
+
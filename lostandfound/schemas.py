@@ -1,6 +1,50 @@
+from flask import current_app
 from marshmallow import fields
+from marshmallow_enum import EnumField
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from marshmallow_sqlalchemy.fields import Nested
 
+from lostandfound.models import Item, ItemStatus, Match
 from settings import LOSTANDFOUND_IMAGES_STATIC_PATH
 from users.schemas import UserSchema
+
+
+class ItemSchema(SQLAlchemyAutoSchema):
+    class Meta:
+        model = Item
+        include_relationships = True
+        load_instance = True
+        exclude = ("grid_cell", "version")
+
+    status = EnumField(ItemStatus)
+    image = fields.Function(lambda item: image_url(item.image))
+    thumbnails = fields.Function(lambda item: thumbnail_urls(item.image))
+    created_by = Nested(UserSchema, only=("id", "name"))
+    updated_by = Nested(UserSchema, only=("id", "name"))
+
+
+def image_url(name):
+    return '/{}/{}'.format(LOSTANDFOUND_IMAGES_STATIC_PATH, name) if name else None
+
+
+def thumbnail_urls(name):
+    if not name:
+        return None
+    return {size_name: '/{}/{}/{}'.format(LOSTANDFOUND_IMAGES_STATIC_PATH, size_name, name)
+            for size_name in current_app.config.get('IMAGE_DERIVATIVE_SIZES', {})}
+
+
+item_schema = ItemSchema()
+items_schema = ItemSchema(many=True)
+
+
+class MatchSchema(SQLAlchemyAutoSchema):
+    class Meta:
+        model = Match
+        include_fk = True
+
+    lost_item = Nested(ItemSchema)
+    found_item = Nested(ItemSchema)
+
+
+matches_schema = MatchSchema(many=True)
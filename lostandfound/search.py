@@ -0,0 +1,58 @@
+import re
+
+from sqlalchemy import Column, DDL, Float, Integer, MetaData, Text, Table, event, func, literal_column
+
+from app import db
+from lostandfound.models import Item
+
+# FTS5 index over item descriptions, kept in sync by triggers. It reads the
+# text from the item table itself (external content), so nothing is stored twice.
+# Keep in sync with the migration that creates it.
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS item_fts USING fts5("
+    "description, content='item', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS item_fts_ai AFTER INSERT ON item BEGIN "
+    "INSERT INTO item_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS item_fts_ad AFTER DELETE ON item BEGIN "
+    "INSERT INTO item_fts(item_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS item_fts_au AFTER UPDATE OF description ON item BEGIN "
+    "INSERT INTO item_fts(item_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO item_fts(rowid, description) VALUES (new.id, new.description); END",
+]
+
+# Not part of db.metadata, the table is managed by the DDL above
+item_fts = Table('item_fts', MetaData(),
+                 Column('rowid', Integer),
+                 Column('description', Text),
+                 Column('rank', Float))
+
+for statement in FTS_DDL:
+    event.listen(Item.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Item.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS item_fts').execute_if(dialect='sqlite'))
+
+
+def match_expression(text):
+    """
+    Turns free text into an FTS5 query matching every word, so user input
+    can't inject FTS5 syntax. Returns None if there is nothing to search.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join('"{}"'.format(word) for word in words)
+
+
+def search_items(query, text):
+    """
+    Restricts an item query to descriptions matching ``text``. Rows become
+    (Item, rank, snippet) tuples, rank being the BM25 score (lower is better).
+    """
+    snippet = func.snippet(literal_column('item_fts'), 0, '<mark>', '</mark>', '…', 16)
+    return query.join(item_fts, item_fts.c.rowid == Item.id) \
+        .filter(literal_column('item_fts').op('MATCH')(match_expression(text))) \
+        .add_columns(item_fts.c.rank, snippet.label('snippet'))
+
+
+def rebuild_index():
+    db.session.execute("INSERT INTO item_fts(item_fts) VALUES ('rebuild')")
+    db.session.commit()
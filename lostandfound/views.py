@@ -1,18 +1,443 @@
 import base64
+import mimetypes
 import os
 import uuid
 from pathlib import Path
 
 import dateutil
 from dateutil.parser import parser
-from flask import Blueprint, jsonify, request
+from dateutil.tz import tzutc
+from flask import Blueprint, abort, current_app, jsonify, request, send_file, send_from_directory
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import desc, and_, func
 from sqlalchemy.exc import IntegrityError
 
-from app import db
+from app import db, image_derivatives
 from auth.utils import role_required
-from settings import LOSTANDFOUND_IMAGES_FILE_PATH
+from lostandfound.images import IMAGE_NAME, STORED_NAME, image_path, save_upload
+from lostandfound.matching import update_matches
+from lostandfound.models import Item, ItemStatus, Match
+from lostandfound.schemas import item_schema, items_schema, matches_schema
+from lostandfound.search import item_fts, match_expression, search_items
+from settings import LOSTANDFOUND_IMAGES_STATIC_PATH
 from users.models import Role, User
+from utils.conditional import collection_validators, not_modified, precondition_failed, resource_validators, \
+    set_validators
+from utils.pagination import get_per_page, keyset_paginate, with_total_count
+from utils.queries import query_budget
+from utils.routing import read_only
+from utils.schemas import eager_load_options
+from utils.serializer import dump, json_response
 
 lostandfound_app = Blueprint('lostandfound_app', __name__)
+
+
+@lostandfound_app.route('/items', methods=['GET'])
+@read_only
+@query_budget(7)
+@jwt_required
+def list_items():
+    """
+    Searches lost and found items, newest first or by relevance when searching text
+    ---
+    tags:
+        - Items
+    parameters:
+        - in: query
+          name: q
+          description: Words to search in the descriptions, results are ranked by BM25 and get a snippet. A
+                       search without any word (e.g. only punctuation) is rejected
+        - in: query
+          name: status
+          description: lost or found
+        - in: query
+          name: category
+        - in: query
+          name: from
+          description: Only items lost/found on or after this date
+        - in: query
+          name: to
+          description: Only items lost/found on or before this date
+        - in: query
+          name: min_lat
+        - in: query
+          name: max_lat
+        - in: query
+          name: min_lon
+        - in: query
+          name: max_lon
+        - in: query
+          name: cursor
+          description: Cursor returned in the X-Next-Cursor header of the previous page
+        - in: query
+          name: per_page
+        - in: query
+          name: count
+          description: Set to true to get the X-Total-Count header and the ETag/Last-Modified validators
+    responses:
+        200:
+            description: Returns a list of items
+        304:
+            description: The results did not change since the If-None-Match/If-Modified-Since validators
+        422:
+            description: A filter has an invalid value, or the search has no words
+    """
+    query, error = _search_query(request.args)
+    if error:
+        return jsonify(message=error), 422
+    text = request.args.get('q', '')
+    if text.strip() and not match_expression(text):
+        return jsonify(message='The search has no words'), 422
+    if match_expression(text):
+        query = search_items(query, text)
+    per_page = get_per_page()
+    cursor = request.args.get('cursor')
+    with_count = with_total_count()
+    if with_count:
+        etag, last_modified, count = collection_validators(query, Item, request.query_string)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+    query = query.options(*eager_load_options(items_schema))
+    if match_expression(text):
+        rows, next_cursor = keyset_paginate(query, [item_fts.c.rank, Item.id], cursor, per_page,
+                                            row_values=lambda row: [row.rank, row.Item.id])
+        result = dump(items_schema, [row.Item for row in rows])
+        for item, row in zip(result, rows):
+            item['snippet'] = row.snippet
+    else:
+        items, next_cursor = keyset_paginate(query, [Item.occurred_on, Item.id], cursor, per_page, descending=True)
+        result = dump(items_schema, items)
+    response = json_response(result)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    if with_count:
+        response.headers['X-Total-Count'] = count
+        set_validators(response, etag, last_modified)
+    return response
+
+
+@lostandfound_app.route('/items/<int:item_id>', methods=['GET'])
+@read_only
+@query_budget(5)
+@jwt_required
+def get_item(item_id):
+    """
+    Gets an item
+    ---
+    tags:
+        - Items
+    parameters:
+        - in: parameter
+          name: item_id
+    responses:
+        200:
+            description: Returns an item instance
+        304:
+            description: The item did not change since the If-None-Match/If-Modified-Since validators
+    """
+    item = Item.query.filter_by(id=item_id, active=True).first()
+    if item:
+        etag, last_modified = resource_validators(item)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+        result = dump(item_schema, item)
+        return set_validators(json_response(result), etag, last_modified)
+    else:
+        return jsonify(message="Item does not exist"), 404
+
+
+@lostandfound_app.route('/items/<int:item_id>/matches', methods=['GET'])
+@read_only
+@query_budget(4)
+@jwt_required
+def list_item_matches(item_id):
+    """
+    Gets the candidate matches of an item, best first
+    ---
+    tags:
+        - Items
+    parameters:
+        - in: parameter
+          name: item_id
+    responses:
+        200:
+            description: Returns the matches, each with the lost and the found item
+    """
+    item = Item.query.filter_by(id=item_id, active=True).first()
+    if item:
+        column = Match.lost_item_id if item.status == ItemStatus.lost else Match.found_item_id
+        query = Match.query.filter(column == item.id).order_by(Match.score.desc(), Match.id)
+        matches = query.options(*eager_load_options(matches_schema)).all()
+        return json_response(dump(matches_schema, matches))
+    else:
+        return jsonify(message="Item does not exist"), 404
+
+
+@lostandfound_app.route('/items', methods=['POST'])
+@jwt_required
+def create_item():
+    """
+    Reports a lost or found item
+    ---
+    tags:
+        - Items
+    parameters:
+        - in: body
+          name: Item
+    responses:
+        201:
+            description: Item created
+        422:
+            description: A field has an invalid value
+    """
+    values, error = _item_values(request.json, required=('status', 'category', 'occurred_on'))
+    if error:
+        return jsonify(message=error), 422
+    item = Item(**values)
+    db.session.add(item)
+    db.session.flush()
+    update_matches(item)
+    db.session.commit()
+    result = item_schema.dump(item)
+    return set_validators(jsonify(result), *resource_validators(item)), 201
+
+
+@lostandfound_app.route('/items/<int:item_id>', methods=['PUT'])
+@jwt_required
+def edit_item(item_id):
+    """
+    Edits an item
+    ---
+    tags:
+        - Items
+    parameters:
+        - in: parameter
+          name: item_id
+        - in: body
+          name: Item
+    responses:
+        200:
+            description: Item edited
+        412:
+            description: The If-Match header does not match the current item ETag
+        422:
+            description: A field has an invalid value
+    """
+    item = Item.query.filter_by(id=item_id, active=True).first()
+    if item:
+        failed = precondition_failed(resource_validators(item)[0])
+        if failed:
+            return failed
+        values, error = _item_values(request.json)
+        if error:
+            return jsonify(message=error), 422
+        for key, value in values.items():
+            setattr(item, key, value)
+        db.session.flush()
+        update_matches(item)
+        db.session.commit()
+        result = item_schema.dump(item)
+        return set_validators(jsonify(result), *resource_validators(item))
+    else:
+        return jsonify(message="Item does not exist"), 404
+
+
+@lostandfound_app.route('/items/<int:item_id>/image', methods=['PUT'])
+@jwt_required
+def upload_item_image(item_id):
+    """
+    Uploads the image of an item, replacing the previous one
+    ---
+    tags:
+        - Items
+    consumes:
+        - image/jpeg
+        - image/png
+        - image/gif
+        - image/webp
+        - multipart/form-data
+    parameters:
+        - in: parameter
+          name: item_id
+        - in: body
+          name: image
+          description: The image as the raw body, or as the image field of a multipart/form-data body
+    responses:
+        200:
+            description: Image uploaded, returns the item
+        412:
+            description: The If-Match header does not match the current item ETag
+        413:
+            description: The image is larger than IMAGE_MAX_SIZE
+        415:
+            description: The body is not a JPEG, PNG, GIF or WebP image
+    """
+    item = Item.query.filter_by(id=item_id, active=True).first()
+    if item:
+        failed = precondition_failed(resource_validators(item)[0])
+        if failed:
+            return failed
+        # The previous image is left to 'flask items gc-images', other items may use the same content
+        item.image = save_upload(request)
+        db.session.commit()
+        image_derivatives.schedule(item.image)
+        result = item_schema.dump(item)
+        return set_validators(jsonify(result), *resource_validators(item))
+    else:
+        return jsonify(message="Item does not exist"), 404
+
+
+@lostandfound_app.route('/{}/<filename>'.format(LOSTANDFOUND_IMAGES_STATIC_PATH), methods=['GET'])
+def get_image(filename):
+    # Only stored images, never temporary uploads or other files of the storage directory
+    if not STORED_NAME.match(filename):
+        abort(404)
+    path = image_path(current_app.config['LOSTANDFOUND_IMAGES_FILE_PATH'], filename)
+    if not IMAGE_NAME.match(filename):
+        return send_from_directory(str(path.parent), path.name)
+    return _send_immutable(path, filename.split('.')[0])
+
+
+@lostandfound_app.route('/{}/<size_name>/<filename>'.format(LOSTANDFOUND_IMAGES_STATIC_PATH), methods=['GET'])
+def get_image_derivative(size_name, filename):
+    path = image_derivatives.get(filename, size_name)
+    if path is None:
+        abort(404)
+    if not IMAGE_NAME.match(filename):
+        return send_from_directory(str(path.parent), path.name)
+    return _send_immutable(path, '{}-{}'.format(filename.split('.')[0], size_name))
+
+
+def _send_immutable(path, etag):
+    """
+    Sends an image named by its content, so a URL always returns the same
+    bytes: it is cached for ``IMAGE_CACHE_MAX_AGE`` as immutable, and
+    answers If-None-Match with 304 and Range requests with 206. With
+    ``IMAGE_OFFLOAD`` only the headers are made here, the front server sends
+    the file (and handles the ranges).
+    """
+    config = current_app.config
+    offload = config.get('IMAGE_OFFLOAD')
+    if offload in ('x-sendfile', 'x-accel-redirect'):
+        response = current_app.response_class(mimetype=mimetypes.guess_type(path.name)[0])
+        if offload == 'x-sendfile':
+            response.headers['X-Sendfile'] = str(path)
+        else:
+            relative = path.relative_to(config['LOSTANDFOUND_IMAGES_FILE_PATH']).as_posix()
+            response.headers['X-Accel-Redirect'] = config['IMAGE_ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + relative
+    elif offload:
+        raise ValueError('Unknown IMAGE_OFFLOAD: {}'.format(offload))
+    else:
+        response = send_file(str(path), conditional=False, add_etags=False)
+    response.cache_control.public = True
+    response.cache_control.max_age = config.get('IMAGE_CACHE_MAX_AGE', 365 * 24 * 3600)
+    response.cache_control.immutable = True
+    # max-age is enough, send_file also sets Expires
+    response.headers.pop('Expires', None)
+    response.set_etag(etag)
+    if offload:
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            response.headers.pop('X-Sendfile', None)
+            response.headers.pop('X-Accel-Redirect', None)
+        return response
+    response.accept_ranges = 'bytes'
+    return response.make_conditional(request, accept_ranges=True, complete_length=path.stat().st_size)
+
+
+@lostandfound_app.route('/items/<int:item_id>', methods=['DELETE'])
+@role_required(Role.admin)
+def delete_item(item_id):
+    """
+    Deletes an item
+    ---
+    tags:
+        - Items
+    parameters:
+        - in: parameter
+          name: item_id
+    responses:
+        200:
+            description: Item deleted
+        412:
+            description: The If-Match header does not match the current item ETag
+    """
+    item = Item.query.filter_by(id=item_id, active=True).first()
+    if item:
+        failed = precondition_failed(resource_validators(item)[0])
+        if failed:
+            return failed
+        item.active = False
+        update_matches(item)
+        db.session.commit()
+        return jsonify(message="Item deleted")
+    else:
+        return jsonify(message="Item does not exist"), 404
+
+
+def _search_query(args):
+    query = Item.query.filter_by(active=True)
+    status = args.get('status')
+    if status:
+        if status not in set(item.value for item in ItemStatus):
+            return None, 'The status provided does not exist'
+        query = query.filter(Item.status == ItemStatus(status))
+    category = args.get('category')
+    if category:
+        query = query.filter(Item.category == category.strip().lower())
+    for name, condition in (('from', Item.occurred_on.__ge__), ('to', Item.occurred_on.__le__)):
+        if args.get(name):
+            value = _parse_datetime(args[name])
+            if value is None:
+                return None, 'Invalid date for {}'.format(name)
+            query = query.filter(condition(value))
+    for name, condition in (('min_lat', Item.latitude.__ge__), ('max_lat', Item.latitude.__le__),
+                            ('min_lon', Item.longitude.__ge__), ('max_lon', Item.longitude.__le__)):
+        if args.get(name):
+            value = args.get(name, type=float)
+            if value is None:
+                return None, 'Invalid coordinate for {}'.format(name)
+            query = query.filter(condition(value))
+    return query, None
+
+
+def _item_values(data, required=()):
+    data = data or {}
+    missing = [field for field in required if data.get(field) in (None, '')]
+    if missing:
+        return None, 'Missing fields: {}'.format(', '.join(missing))
+    values = {}
+    if 'status' in data:
+        if data['status'] not in set(item.value for item in ItemStatus):
+            return None, 'The status provided does not exist'
+        values['status'] = ItemStatus(data['status'])
+    if 'category' in data:
+        if not isinstance(data['category'], str) or not data['category'].strip():
+            return None, 'Invalid category'
+        values['category'] = data['category'].strip().lower()
+    if 'occurred_on' in data:
+        values['occurred_on'] = _parse_datetime(data['occurred_on'])
+        if values['occurred_on'] is None:
+            return None, 'Invalid date for occurred_on'
+    if 'description' in data:
+        values['description'] = data['description'] or ''
+    for name, limit in (('latitude', 90), ('longitude', 180)):
+        if name in data:
+            value = data[name]
+            if value is not None and (not isinstance(value, (int, float)) or abs(value) > limit):
+                return None, 'Invalid {}'.format(name)
+            values[name] = value
+    return values, None
+
+
+def _parse_datetime(value):
+    """Parses a date string into a naive UTC datetime, or returns None."""
+    try:
+        parsed = parser().parse(str(value))
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(tzutc()).replace(tzinfo=None)
+    return parsed
@@ -1,7 +1,15 @@
+import os
+
+import click
+from flask import current_app
 from flask.cli import with_appcontext
-from werkzeug.security import generate_password_hash
 
-from app import create_app, auth_cli, db
+from app import create_app, auth_cli, doc_cli, items_cli, db, revocation, password_hasher
+from doc.views import write_spec
+from lostandfound.images import collect_garbage, image_references
+from lostandfound.matching import rebuild_matches
+from lostandfound.search import rebuild_index
+from users.importer import IMPORT_FORMATS, import_stream
 from users.models import User, Role
 
 app = create_app()
@@ -12,8 +20,67 @@ app = create_app()
 def db_seed():
     user = User(email='andre@meneses.pt',
                 name='André Meneses',
-                password=generate_password_hash('devpassword'),
+                password=password_hasher.hash('devpassword'),
                 role=Role.admin)
     db.session.add(user)
     db.session.commit()
     print('Admin user seeded!')
+
+
+@auth_cli.command("purge_revoked")
+@with_appcontext
+def purge_revoked():
+    revocation.purge()
+    print('Expired revoked tokens purged!')
+
+
+@auth_cli.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "import_format", type=click.Choice(IMPORT_FORMATS),
+              help="Defaults to the file extension")
+@with_appcontext
+def import_users(path, import_format):
+    import_format = import_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if import_format not in IMPORT_FORMATS:
+        raise click.BadParameter('Unknown format, use --format', param_hint='--format')
+    with open(path, 'rb') as stream:
+        report = import_stream(stream, import_format,
+                               batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 500))
+    for error in report['errors']:
+        print('Row {row} ({email}): {message}'.format(**error))
+    print('Imported {imported} of {rows} users in {seconds}s ({rows_per_sec} rows/sec)'.format(**report))
+
+
+@doc_cli.command("export-spec")
+@click.argument("path", required=False)
+@with_appcontext
+def export_spec(path):
+    path = path or current_app.config.get('DOC_SPEC_FILE')
+    if not path:
+        raise click.BadParameter('Give a path or set DOC_SPEC_FILE', param_hint='path')
+    write_spec(current_app._get_current_object(), path)
+    print('Spec written to {}'.format(path))
+
+
+@items_cli.command("rebuild-search")
+@with_appcontext
+def rebuild_search():
+    rebuild_index()
+    print('Item search index rebuilt!')
+
+
+@items_cli.command("rebuild-matches")
+@with_appcontext
+def rebuild_all_matches():
+    rebuild_matches()
+    print('Item matches rebuilt!')
+
+
+@items_cli.command("gc-images")
+@click.option("--grace-period", type=int, help="Seconds an unreferenced image is kept, defaults to IMAGE_GC_GRACE_PERIOD")
+@with_appcontext
+def gc_images(grace_period):
+    if grace_period is None:
+        grace_period = current_app.config.get('IMAGE_GC_GRACE_PERIOD', 3600)
+    deleted = collect_garbage(image_references(), grace_period)
+    print('{} unreferenced images deleted!'.format(deleted))
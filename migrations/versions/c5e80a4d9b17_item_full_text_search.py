@@ -0,0 +1,37 @@
+"""Item full text search.
+
+Revision ID: c5e80a4d9b17
+Revises: 05609f80d5ff
+Create Date: 2026-10-18 16:47:20.184533
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e80a4d9b17'
+down_revision = '05609f80d5ff'
+branch_labels = None
+depends_on = None
+
+
+# Batch operations that recreate the item table drop these triggers, recreate them afterwards
+def upgrade():
+    op.execute("CREATE VIRTUAL TABLE item_fts USING fts5("
+               "description, content='item', content_rowid='id', tokenize='porter unicode61')")
+    op.execute("CREATE TRIGGER item_fts_ai AFTER INSERT ON item BEGIN "
+               "INSERT INTO item_fts(rowid, description) VALUES (new.id, new.description); END")
+    op.execute("CREATE TRIGGER item_fts_ad AFTER DELETE ON item BEGIN "
+               "INSERT INTO item_fts(item_fts, rowid, description) VALUES ('delete', old.id, old.description); END")
+    op.execute("CREATE TRIGGER item_fts_au AFTER UPDATE OF description ON item BEGIN "
+               "INSERT INTO item_fts(item_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+               "INSERT INTO item_fts(rowid, description) VALUES (new.id, new.description); END")
+    op.execute("INSERT INTO item_fts(item_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS item_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS item_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS item_fts_ai")
+    op.execute("DROP TABLE IF EXISTS item_fts")
@@ -0,0 +1,32 @@
+"""Widen User.password.
+
+Revision ID: e2b7c4a91f03
+Revises: d43885f5f741
+Create Date: 2026-10-18 14:12:48.305917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4a91f03'
+down_revision = 'd43885f5f741'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+                              existing_type=sa.String(length=94),
+                              type_=sa.String(length=255),
+                              existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+                              existing_type=sa.String(length=255),
+                              type_=sa.String(length=94),
+                              existing_nullable=False)
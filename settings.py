@@ -4,11 +4,104 @@ SECRET_KEY = os.environ['SECRET_KEY']
 
 DB_FILE = os.environ['DB_FILE']
 basedir = os.path.abspath(os.path.dirname(__file__))
-SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'lostandfound.db')
-SQLALCHEMY_TRACK_MODIFICATIONS = True
+SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, DB_FILE)
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+# Read only endpoints are answered by the replica, kept up to date outside the app (e.g. Litestream, rsync)
+DB_REPLICA_FILE = os.environ.get('DB_REPLICA_FILE')
+if DB_REPLICA_FILE:
+    SQLALCHEMY_BINDS = {'replica': 'sqlite:///' + os.path.join(basedir, DB_REPLICA_FILE)}
+# Writers read from the primary for this long, only on the worker that served their write
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'wal')
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'normal')
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
 
 JWT_SECRET_KEY = os.environ['JWT_SECRET_KEY']
 JWT_BLACKLIST_ENABLED = os.environ['JWT_BLACKLIST_ENABLED']
+JWT_ROLE_CLAIMS = os.environ.get('JWT_ROLE_CLAIMS', 'false').lower() == 'true'
+JWT_REVOCATION_BACKEND = os.environ.get('JWT_REVOCATION_BACKEND', 'memory')
+JWT_REVOCATION_PURGE_INTERVAL = int(os.environ.get('JWT_REVOCATION_PURGE_INTERVAL', 3600))
+
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:150000')
+PASSWORD_HASH_SALT_LENGTH = int(os.environ.get('PASSWORD_HASH_SALT_LENGTH', 8))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 0))
 
 LOSTANDFOUND_IMAGES_FILE_PATH = os.path.join(basedir, os.environ['LOSTANDFOUND_IMAGES_STATIC_PATH'])
 LOSTANDFOUND_IMAGES_STATIC_PATH = os.environ['LOSTANDFOUND_IMAGES_STATIC_PATH']
+IMAGE_MAX_SIZE = int(os.environ.get('IMAGE_MAX_SIZE', 10 * 1024 * 1024))
+IMAGE_CHUNK_SIZE = int(os.environ.get('IMAGE_CHUNK_SIZE', 64 * 1024))
+IMAGE_GC_GRACE_PERIOD = int(os.environ.get('IMAGE_GC_GRACE_PERIOD', 3600))
+# Resized copies of the images as name:longest side in pixels
+IMAGE_DERIVATIVE_SIZES = dict((name, int(size)) for name, size in (
+    pair.split(':') for pair in os.environ.get('IMAGE_DERIVATIVE_SIZES', 'thumb:160,small:480,medium:1024').split(',')))
+IMAGE_DERIVATIVE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 0))
+IMAGE_CACHE_MAX_AGE = int(os.environ.get('IMAGE_CACHE_MAX_AGE', 365 * 24 * 3600))
+# Leave sending the image files to the front server: x-sendfile (Apache, lighttpd) or x-accel-redirect (nginx,
+# with an internal location serving LOSTANDFOUND_IMAGES_FILE_PATH at IMAGE_ACCEL_REDIRECT_PREFIX)
+IMAGE_OFFLOAD = os.environ.get('IMAGE_OFFLOAD', '')
+IMAGE_ACCEL_REDIRECT_PREFIX = os.environ.get('IMAGE_ACCEL_REDIRECT_PREFIX', '/protected-images/')
+
+# Response headers browsers let scripts on other origins read, besides the CORS-safelisted ones
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Next-Cursor', 'X-Total-Count', 'RateLimit-Limit', 'RateLimit-Remaining',
+                       'RateLimit-Reset', 'Retry-After']
+
+PAGINATION_PER_PAGE = int(os.environ.get('PAGINATION_PER_PAGE', 10))
+PAGINATION_MAX_PER_PAGE = int(os.environ.get('PAGINATION_MAX_PER_PAGE', 100))
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+# Written by 'flask doc export-spec', ignored with a warning once the routes or their docstrings change
+DOC_SPEC_FILE = os.environ.get('DOC_SPEC_FILE')
+DOC_SPEC_PRECOMPUTE = os.environ.get('DOC_SPEC_PRECOMPUTE', 'false').lower() == 'true'
+DOC_SPEC_MAX_AGE = int(os.environ.get('DOC_SPEC_MAX_AGE', 300))
+
+MATCH_WINDOW_DAYS = int(os.environ.get('MATCH_WINDOW_DAYS', 30))
+MATCH_SLACK_DAYS = int(os.environ.get('MATCH_SLACK_DAYS', 1))
+MATCH_MIN_SCORE = float(os.environ.get('MATCH_MIN_SCORE', 0.3))
+MATCH_MAX_RESULTS = int(os.environ.get('MATCH_MAX_RESULTS', 20))
+MATCH_CANDIDATE_LIMIT = int(os.environ.get('MATCH_CANDIDATE_LIMIT', 500))
+
+COUNTERS_RECONCILE_INTERVAL = int(os.environ.get('COUNTERS_RECONCILE_INTERVAL', 300))
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'flask')
+
+COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+COMPRESS_MIMETYPES = os.environ.get('COMPRESS_MIMETYPES',
+                                    'application/json,application/x-ndjson,text/csv,text/html,text/plain').split(',')
+
+# Limits look like 5/minute (second, minute, hour or day), empty for no limit
+RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+# database is shared by every worker, memory counts per worker (every limit multiplied by the number of workers)
+RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND', 'database')
+# Number of proxies (e.g. nginx) in front of the app, the client IP is then read from X-Forwarded-For
+RATELIMIT_TRUSTED_PROXIES = int(os.environ.get('RATELIMIT_TRUSTED_PROXIES', 0))
+RATELIMIT_PURGE_INTERVAL = int(os.environ.get('RATELIMIT_PURGE_INTERVAL', 300))
+RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT', '')
+# Per IP limits by blueprint as blueprint=limit, e.g. auth_app=60/minute,users_app=600/minute
+RATELIMIT_BLUEPRINTS = dict(pair.split('=') for pair in os.environ.get('RATELIMIT_BLUEPRINTS', '').split(',') if pair)
+RATELIMIT_LOGIN_IP = os.environ.get('RATELIMIT_LOGIN_IP', '20/minute')
+RATELIMIT_LOGIN_EMAIL = os.environ.get('RATELIMIT_LOGIN_EMAIL', '5/minute')
+RATELIMIT_REGISTER_IP = os.environ.get('RATELIMIT_REGISTER_IP', '10/minute')
+RATELIMIT_PASSWORD_IDENTITY = os.environ.get('RATELIMIT_PASSWORD_IDENTITY', '5/minute')
+RATELIMIT_IMPORT_IDENTITY = os.environ.get('RATELIMIT_IMPORT_IDENTITY', '10/hour')
+
+# /metrics is served without a user session, require METRICS_TOKEN as a bearer token or keep it behind the proxy
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_PROFILE_SAMPLE_RATE = float(os.environ.get('METRICS_PROFILE_SAMPLE_RATE', 0))
+METRICS_PROFILE_THRESHOLD = float(os.environ.get('METRICS_PROFILE_THRESHOLD', 0.5))
+METRICS_PROFILE_DIR = os.environ.get('METRICS_PROFILE_DIR', os.path.join(basedir, 'profiles'))
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from flask_migrate import upgrade
+
+# settings.py reads these when the app is created
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ.setdefault('DB_FILE', 'test.db')
+os.environ.setdefault('JWT_SECRET_KEY', 'test')
+os.environ.setdefault('JWT_BLACKLIST_ENABLED', 'true')
+os.environ.setdefault('LOSTANDFOUND_IMAGES_STATIC_PATH', 'images')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'secret'
+
+
+def test_config(tmp_path, **overrides):
+    config = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'test.db'),
+        'LOSTANDFOUND_IMAGES_FILE_PATH': str(tmp_path / 'images'),
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'QUERY_BUDGET_STRICT': True,
+        'RATELIMIT_ENABLED': False,
+        'IMAGE_DERIVATIVE_SIZES': {},
+    }
+    config.update(overrides)
+    return config
+
+
+def make_app(tmp_path, **overrides):
+    """An app on a fresh database in ``tmp_path``, with the schema made by the migrations."""
+    from app import create_app
+
+    app = create_app(**test_config(tmp_path, **overrides))
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    return app
+
+
+def create_user(app, email, role='regular', name='Test'):
+    from app import db, password_hasher
+    from users.models import Role, User
+
+    with app.app_context():
+        user = User(name=name, email=email, password=password_hasher.hash(PASSWORD), role=Role(role))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def login(client, email):
+    """Returns the Authorization header and the tokens of ``email``."""
+    tokens = client.post('/auth/login', json={'email': email, 'password': PASSWORD}).get_json()
+    return {'Authorization': 'Bearer ' + tokens['access_token']}, tokens
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(tmp_path)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app, client):
+    create_user(app, 'admin@test.com', role='admin', name='Admin')
+    return login(client, 'admin@test.com')[0]
@@ -0,0 +1,55 @@
+from app import db, user_cache
+from tests.conftest import create_user, login
+from users.models import Role, User
+
+
+def _change_elsewhere(app, email, **values):
+    # What another worker does: the change is committed, but this worker's user cache is not invalidated
+    with app.app_context():
+        user = User.query.filter_by(email=email).one()
+        for key, value in values.items():
+            setattr(user, key, value)
+        user.token_generation = User.token_generation + 1
+        db.session.commit()
+
+
+def test_generation_bumped_by_another_worker_revokes_tokens(app, client):
+    create_user(app, 'user@test.com')
+    headers, tokens = login(client, 'user@test.com')
+    refresh_headers = {'Authorization': 'Bearer ' + tokens['refresh_token']}
+    assert client.get('/items', headers=headers).status_code == 200
+
+    _change_elsewhere(app, 'user@test.com')
+
+    assert client.get('/items', headers=headers).status_code == 401
+    assert client.post('/auth/refresh', headers=refresh_headers).status_code == 401
+
+
+def test_role_change_by_another_worker_revokes_role_claims(tmp_path):
+    from tests.conftest import make_app
+
+    app = make_app(tmp_path, JWT_ROLE_CLAIMS=True)
+    client = app.test_client()
+    create_user(app, 'other@test.com', role='admin')
+    headers, _ = login(client, 'other@test.com')
+    assert client.get('/users/data', headers=headers).status_code == 200
+
+    _change_elsewhere(app, 'other@test.com', role=Role.regular)
+
+    assert client.get('/users/data', headers=headers).status_code == 401
+    headers, _ = login(client, 'other@test.com')
+    assert client.get('/users/data', headers=headers).status_code == 403
+
+
+def test_stale_cached_user_is_dropped(app, client):
+    create_user(app, 'cached@test.com', role='admin')
+    headers, _ = login(client, 'cached@test.com')
+    # Loads the user into the cache
+    assert client.get('/users/data', headers=headers).status_code == 200
+
+    _change_elsewhere(app, 'cached@test.com', role=Role.regular)
+
+    headers, _ = login(client, 'cached@test.com')
+    assert client.get('/users/data', headers=headers).status_code == 403
+    with app.app_context():
+        assert user_cache.cache.peek('cached@test.com').role == Role.regular
@@ -0,0 +1,50 @@
+import gzip
+
+from tests.conftest import create_user, login, make_app
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def test_compressed_responses_get_their_own_etag(tmp_path):
+    app = make_app(tmp_path, COMPRESS_MIN_SIZE=0)
+    client = app.test_client()
+    create_user(app, 'admin@test.com', role='admin')
+    admin, _ = login(client, 'admin@test.com')
+    path = '/users/{}'.format(create_user(app, 'user@test.com'))
+
+    plain = client.get(path, headers=dict(admin, **{'Accept-Encoding': 'identity'})).headers['ETag']
+    compressed = client.get(path, headers=dict(admin, **GZIP))
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == plain[:-1] + '-gzip"'
+
+    cached = client.get(path, headers=dict(admin, **GZIP, **{'If-None-Match': compressed.headers['ETag']}))
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == compressed.headers['ETag']
+    edit = {'name': 'Edited', 'email': 'user@test.com'}
+    assert client.put(path, headers=dict(admin, **{'If-Match': compressed.headers['ETag']}), json=edit) \
+        .status_code == 200
+    assert client.put(path, headers=dict(admin, **{'If-Match': compressed.headers['ETag']}), json=edit) \
+        .status_code == 412
+
+
+def test_streamed_compression_is_timed(tmp_path):
+    app = make_app(tmp_path, METRICS_ENABLED=True)
+    client = app.test_client()
+    create_user(app, 'admin@test.com', role='admin')
+    admin, _ = login(client, 'admin@test.com')
+
+    response = client.get('/users/export', headers=dict(admin, **GZIP))
+    assert b'admin@test.com' in gzip.decompress(response.get_data())
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="users_app.export_users",phase="compression"' in metrics
+
+
+def test_compressed_spec_is_revalidated(client):
+    compressed = client.get('/doc/spec', headers=GZIP)
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'].endswith('-gzip"')
+
+    cached = client.get('/doc/spec', headers=dict(GZIP, **{'If-None-Match': compressed.headers['ETag']}))
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == compressed.headers['ETag']
+    assert 'max-age' in cached.headers['Cache-Control']
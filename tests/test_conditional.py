@@ -0,0 +1,44 @@
+from app import db
+from lostandfound import views
+from tests.conftest import create_user
+
+ITEM = {'status': 'lost', 'category': 'wallet', 'occurred_on': '2026-03-01', 'description': 'black wallet'}
+
+
+def test_second_edit_with_the_same_etag_fails_within_the_same_second(app, client, admin):
+    user_id = create_user(app, 'user@test.com')
+    etag = client.get('/users/{}'.format(user_id), headers=admin).headers['ETag']
+    edit = {'name': 'First', 'email': 'user@test.com'}
+    first = client.put('/users/{}'.format(user_id), headers=dict(admin, **{'If-Match': etag}), json=edit)
+    assert first.status_code == 200 and first.headers['ETag'] != etag
+    edit = {'name': 'Second', 'email': 'user@test.com'}
+    assert client.put('/users/{}'.format(user_id), headers=dict(admin, **{'If-Match': etag}), json=edit) \
+        .status_code == 412
+    assert client.get('/users/{}'.format(user_id), headers=admin).get_json()['name'] == 'First'
+
+
+def test_item_etag_changes_on_every_edit(client, admin):
+    response = client.post('/items', headers=admin, json=ITEM)
+    path = '/items/{}'.format(response.get_json()['id'])
+    etags = [response.headers['ETag']]
+    for description in ('brown wallet', 'red wallet'):
+        response = client.put(path, headers=dict(admin, **{'If-Match': etags[-1]}), json={'description': description})
+        assert response.status_code == 200
+        etags.append(response.headers['ETag'])
+    assert len(set(etags)) == 3
+    assert client.get(path, headers=dict(admin, **{'If-None-Match': etags[-1]})).status_code == 304
+    assert client.get(path, headers=dict(admin, **{'If-None-Match': etags[0]})).status_code == 200
+
+
+def test_write_between_the_check_and_the_update_fails(client, admin, monkeypatch):
+    item_id = client.post('/items', headers=admin, json=ITEM).get_json()['id']
+    item_values = views._item_values
+
+    def concurrent_write(data, required=()):
+        # Another request updates the item after this one checked If-Match
+        db.session.execute('UPDATE item SET version = version + 1 WHERE id = :id', {'id': item_id})
+        return item_values(data, required)
+
+    monkeypatch.setattr(views, '_item_values', concurrent_write)
+    response = client.put('/items/{}'.format(item_id), headers=admin, json={'description': 'brown wallet'})
+    assert response.status_code == 412
@@ -0,0 +1,30 @@
+from sqlalchemy.pool import QueuePool
+
+from app import create_app, db
+from tests import conftest
+
+
+def _pragma(connection, name):
+    return connection.execute('PRAGMA {}'.format(name)).scalar()
+
+
+def test_pooled_connections_get_the_pragmas(tmp_path):
+    app = create_app(**conftest.test_config(tmp_path, SQLITE_BUSY_TIMEOUT=1234))
+    with app.app_context():
+        assert isinstance(db.engine.pool, QueuePool)
+        for _ in range(2):
+            # The second checkout reuses the pooled connection
+            with db.engine.connect() as connection:
+                assert _pragma(connection, 'journal_mode') == 'wal'
+                assert _pragma(connection, 'busy_timeout') == 1234
+                assert _pragma(connection, 'cache_size') == -64000
+        assert db.engine.pool.checkedin() == 1
+
+
+def test_memory_databases_are_left_alone(tmp_path):
+    app = create_app(**conftest.test_config(tmp_path, SQLALCHEMY_DATABASE_URI='sqlite://'))
+    with app.app_context():
+        assert not isinstance(db.engine.pool, QueuePool)
+        with db.engine.connect() as connection:
+            assert _pragma(connection, 'journal_mode') == 'memory'
+            assert _pragma(connection, 'cache_size') == -2000
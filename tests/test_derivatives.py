@@ -0,0 +1,68 @@
+import hashlib
+import io
+import os
+import struct
+import zlib
+
+import pytest
+from flask import Flask
+from PIL import Image
+from werkzeug.exceptions import ServiceUnavailable, UnsupportedMediaType
+
+from lostandfound import derivatives
+from lostandfound.derivatives import ImageDerivatives
+from lostandfound.images import image_path
+
+
+def _crash(*args):
+    os._exit(1)
+
+
+def _store(directory, content, extension):
+    name = '{}.{}'.format(hashlib.sha256(content).hexdigest(), extension)
+    path = image_path(directory, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return name
+
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def _bomb():
+    # Only the header of a 30000x30000 PNG, Pillow rejects it from the size alone
+    header = struct.pack('>IIBBBBB', 30000, 30000, 1, 0, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + _chunk(b'IHDR', header) + _chunk(b'IDAT', zlib.compress(b'')) + _chunk(b'IEND', b'')
+
+
+def _jpeg():
+    output = io.BytesIO()
+    Image.new('RGB', (400, 300), (200, 120, 40)).save(output, 'JPEG')
+    return output.getvalue()
+
+
+@pytest.fixture
+def images(tmp_path):
+    app = Flask(__name__)
+    app.config.update(LOSTANDFOUND_IMAGES_FILE_PATH=str(tmp_path), IMAGE_DERIVATIVE_SIZES={'thumb': 160},
+                      IMAGE_DERIVATIVE_WORKERS=1)
+    images = ImageDerivatives(app)
+    yield images
+    if images._pool is not None:
+        images._pool.shutdown()
+
+
+def test_decompression_bombs_are_unsupported(images, tmp_path):
+    name = _store(tmp_path, _bomb(), 'png')
+    with pytest.raises(UnsupportedMediaType):
+        images.get(name, 'thumb')
+
+
+def test_a_dead_worker_returns_503_and_the_pool_is_replaced(images, tmp_path, monkeypatch):
+    name = _store(tmp_path, _jpeg(), 'jpg')
+    monkeypatch.setattr(derivatives, 'generate_derivatives', _crash)
+    with pytest.raises(ServiceUnavailable):
+        images.get(name, 'thumb')
+    monkeypatch.undo()
+    assert images.get(name, 'thumb').exists()
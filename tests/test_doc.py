@@ -0,0 +1,47 @@
+import json
+
+from doc import views
+from doc.views import SOURCE_HASH_KEY, write_spec
+from tests.conftest import make_app
+
+
+def _count_builds(monkeypatch):
+    builds = []
+    build_spec = views.build_spec
+    monkeypatch.setattr(views, 'build_spec', lambda app: builds.append(app) or build_spec(app))
+    return builds
+
+
+def test_spec_is_built_once_and_served_from_the_extensions(app, client, monkeypatch):
+    builds = _count_builds(monkeypatch)
+    first = client.get('/doc/spec')
+    second = client.get('/doc/spec')
+    assert len(builds) == 1
+    assert first.get_data() == second.get_data() == app.extensions['doc_spec'][0]
+    assert '/users' in first.get_json()['paths']
+    assert client.get('/doc/spec', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_current_spec_file_is_served_without_building(tmp_path, monkeypatch):
+    spec_file = tmp_path / 'spec.json'
+    app = make_app(tmp_path, DOC_SPEC_FILE=str(spec_file))
+    write_spec(app, str(spec_file))
+    builds = _count_builds(monkeypatch)
+    assert app.test_client().get('/doc/spec').get_data() == spec_file.read_bytes()
+    assert builds == []
+
+
+def test_stale_spec_file_is_ignored_with_a_warning(tmp_path, monkeypatch):
+    spec_file = tmp_path / 'spec.json'
+    app = make_app(tmp_path, DOC_SPEC_FILE=str(spec_file))
+    write_spec(app, str(spec_file))
+    spec = json.loads(spec_file.read_text())
+    spec[SOURCE_HASH_KEY] = 'an older version of the views'
+    spec_file.write_text(json.dumps(spec))
+    builds = _count_builds(monkeypatch)
+    warnings = []
+    monkeypatch.setattr(app.logger, 'warning', lambda message, *args: warnings.append(message % args))
+    response = app.test_client().get('/doc/spec')
+    assert len(builds) == 1
+    assert response.get_json()[SOURCE_HASH_KEY] != spec[SOURCE_HASH_KEY]
+    assert len(warnings) == 1 and str(spec_file) in warnings[0]
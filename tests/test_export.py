@@ -0,0 +1,47 @@
+import tracemalloc
+
+import pytest
+
+from app import db
+from users.models import Role, User
+
+
+def _add_users(app, count, prefix='user'):
+    with app.app_context():
+        db.session.bulk_insert_mappings(User, [
+            dict(email='{}{}@test.com'.format(prefix, number), name='User {}'.format(number), password='x',
+                 role=Role.regular, active=True, token_generation=0) for number in range(count)])
+        db.session.commit()
+
+
+def _peak_kb(client, admin, path):
+    tracemalloc.start()
+    try:
+        response = client.get(path, headers=admin, buffered=False)
+        size = sum(len(chunk) for chunk in response.response)
+        return tracemalloc.get_traced_memory()[1] // 1024, size
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('export_format, header_lines', [('ndjson', 0), ('csv', 1)])
+def test_export_flushes_one_chunk_per_batch(app, client, admin, export_format, header_lines):
+    app.config['EXPORT_BATCH_SIZE'] = 10
+    _add_users(app, 45)
+    response = client.get('/users/export?format=' + export_format, headers=admin, buffered=False)
+    assert response.is_streamed
+    chunks = [chunk.decode() for chunk in response.response if chunk]
+    lines = [chunk.count('\n') for chunk in chunks]
+    # The admin and 45 users in batches of 10, the CSV header goes with the first one
+    assert lines == [10 + header_lines, 10, 10, 10, 6]
+
+
+def test_export_memory_does_not_grow_with_the_table(app, client, admin):
+    app.config['EXPORT_BATCH_SIZE'] = 100
+    _add_users(app, 500)
+    small_peak, small_size = _peak_kb(client, admin, '/users/export')
+    _add_users(app, 5000, prefix='more')
+    large_peak, large_size = _peak_kb(client, admin, '/users/export')
+    assert large_size > 9 * small_size
+    # The whole export held in memory would grow ten times too
+    assert large_peak < small_peak * 2
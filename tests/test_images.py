@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from app import db
+from lostandfound.images import TEMP_PREFIX, collect_garbage, image_references
+from lostandfound.models import Item
+from settings import LOSTANDFOUND_IMAGES_STATIC_PATH
+from tests.test_uploads import ITEM, jpeg
+
+LEGACY_NAME = '0123456789abcdef0123456789abcdef.jpg'
+IMAGES = '/{}/'.format(LOSTANDFOUND_IMAGES_STATIC_PATH)
+
+
+def _upload(client, admin, content=None):
+    item = client.post('/items', headers=admin, json=ITEM).get_json()
+    response = client.put('/items/{}/image'.format(item['id']), headers=admin, data=content or jpeg(),
+                          content_type='image/jpeg')
+    return item['id'], response.get_json()['image']
+
+
+def _write(directory, *parts, age=0):
+    path = os.path.join(directory, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(b'\xff\xd8\xff\xe0')
+    os.utime(path, (time.time() - age, time.time() - age))
+    return path
+
+
+def test_only_stored_images_are_served(app, client, admin):
+    directory = app.config['LOSTANDFOUND_IMAGES_FILE_PATH']
+    _, url = _upload(client, admin)
+    assert client.get(url).status_code == 200
+    # Older uploads were stored flat under random names
+    _write(directory, LEGACY_NAME)
+    assert client.get(IMAGES + LEGACY_NAME).status_code == 200
+
+    _write(directory, TEMP_PREFIX + 'abc123')
+    _write(directory, 'notes.txt')
+    for name in (TEMP_PREFIX + 'abc123', 'notes.txt', url.split('/')[-1][:2], '.hidden.jpg'):
+        assert client.get(IMAGES + name).status_code == 404
+
+
+def test_garbage_collection_keeps_referenced_and_recent_images(app, client, admin):
+    directory = app.config['LOSTANDFOUND_IMAGES_FILE_PATH']
+    _, kept = _upload(client, admin)
+    item_id, replaced = _upload(client, admin, jpeg() + b'other')
+    kept, replaced = kept.split('/')[-1], replaced.split('/')[-1]
+    with app.app_context():
+        Item.query.get(item_id).image = None
+        db.session.commit()
+    old = 2 * 3600
+    for name in (kept, replaced):
+        os.utime(os.path.join(directory, name[:2], name[2:4], name), (time.time() - old, time.time() - old))
+    abandoned = _write(directory, TEMP_PREFIX + 'old', age=old)
+    recent = _write(directory, TEMP_PREFIX + 'recent')
+    legacy = _write(directory, LEGACY_NAME, age=old)
+
+    with app.app_context():
+        assert collect_garbage(image_references(), 3600) == 3
+    remaining = sorted(name for _, _, files in os.walk(directory) for name in files)
+    assert remaining == sorted([kept, os.path.basename(recent)])
+    assert not os.path.exists(abandoned) and not os.path.exists(legacy)
+
+
+def test_images_are_immutable_and_served_by_ranges(app, client, admin):
+    content = jpeg()
+    _, url = _upload(client, admin, content)
+    response = client.get(url)
+    assert response.get_data() == content
+    cache_control = response.headers['Cache-Control']
+    assert 'immutable' in cache_control and 'max-age=31536000' in cache_control
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    partial = client.get(url, headers={'Range': 'bytes=0-9'})
+    assert partial.status_code == 206
+    assert partial.get_data() == content[:10]
+    assert partial.headers['Content-Range'] == 'bytes 0-9/{}'.format(len(content))
+
+
+@pytest.mark.parametrize('offload', ['x-sendfile', 'x-accel-redirect'])
+def test_images_can_be_sent_by_the_front_server(app, client, admin, offload):
+    app.config.update(IMAGE_OFFLOAD=offload, IMAGE_ACCEL_REDIRECT_PREFIX='/protected/')
+    _, url = _upload(client, admin)
+    name = url.split('/')[-1]
+    response = client.get(url)
+    assert response.status_code == 200 and response.get_data() == b''
+    assert response.mimetype == 'image/jpeg'
+    if offload == 'x-sendfile':
+        assert response.headers['X-Sendfile'] == os.path.join(app.config['LOSTANDFOUND_IMAGES_FILE_PATH'],
+                                                              name[:2], name[2:4], name)
+    else:
+        assert response.headers['X-Accel-Redirect'] == '/protected/{}/{}/{}'.format(name[:2], name[2:4], name)
+    cached = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+    assert 'X-Sendfile' not in cached.headers and 'X-Accel-Redirect' not in cached.headers
@@ -0,0 +1,39 @@
+from app import counters
+from users import importer
+from users.models import User
+
+
+def _import(client, admin, rows):
+    response = client.post('/users/import', headers=admin, json=rows)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _row(email, **values):
+    row = {'email': email, 'name': 'Imported', 'password': 'secret', 'role': 'regular'}
+    row.update(values)
+    return row
+
+
+def test_rows_with_non_string_fields_are_reported(client, admin):
+    report = _import(client, admin, [
+        _row(['a@test.com']), _row({'b': 1}), _row('c@test.com', role=['admin']), _row('d@test.com', role={}),
+        _row('e@test.com', name=5), _row('f@test.com'),
+    ])
+    assert report['imported'] == 1
+    assert [(error['row'], error['email']) for error in report['errors']] == [
+        (1, None), (2, None), (3, 'c@test.com'), (4, 'd@test.com'), (5, 'e@test.com')]
+    assert report['errors'][2]['message'] == 'Fields must be strings: role'
+    # Empty, like an empty string
+    assert report['errors'][3]['message'] == 'Missing fields: role'
+
+
+def test_emails_created_meanwhile_are_reported_per_row(app, client, admin, monkeypatch):
+    # As if another request created admin@test.com after the batch looked for existing emails
+    monkeypatch.setattr(importer, '_existing_emails', lambda emails: set())
+    report = _import(client, admin, [_row('admin@test.com'), _row('new1@test.com'), _row('new2@test.com')])
+    assert report['imported'] == 2
+    assert report['errors'] == [{'row': 1, 'email': 'admin@test.com', 'message': 'That email already exists.'}]
+    with app.app_context():
+        assert User.query.count() == 3
+        assert counters.get('users.active') == 3
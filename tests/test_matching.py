@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from app import db
+from lostandfound.matching import rebuild_matches
+from lostandfound.models import Item, ItemStatus, Match
+from utils.queries import QueryCounter
+
+LOST_ON = datetime(2026, 3, 1)
+
+
+def _found(days, description='black leather wallet'):
+    return Item(status=ItemStatus.found, category='wallet', occurred_on=LOST_ON + timedelta(days=days),
+                description=description, latitude=38.7, longitude=-9.1)
+
+
+def test_dense_blocks_keep_the_candidates_closest_in_time(app, client, admin):
+    app.config.update(MATCH_CANDIDATE_LIMIT=3, MATCH_SLACK_DAYS=30)
+    with app.app_context():
+        # Found long before, they come first in insertion and index order
+        db.session.add_all([_found(days) for days in (-28, -27, -26, -25)])
+        closest = _found(1)
+        db.session.add(closest)
+        db.session.commit()
+        closest_id = closest.id
+    lost = client.post('/items', headers=admin, json={
+        'status': 'lost', 'category': 'wallet', 'occurred_on': LOST_ON.isoformat(),
+        'description': 'black leather wallet', 'latitude': 38.7, 'longitude': -9.1}).get_json()
+    matches = client.get('/items/{}/matches'.format(lost['id']), headers=admin).get_json()
+    assert matches[0]['found_item']['id'] == closest_id
+    assert len(matches) == 3
+
+    with app.app_context():
+        incremental = sorted((match.lost_item_id, match.found_item_id) for match in Match.query)
+        rebuild_matches()
+        assert sorted((match.lost_item_id, match.found_item_id) for match in Match.query) == incremental
+
+
+def test_matches_of_items_reported_through_the_api_stay_within_budget(app, client, admin):
+    item = {'category': 'wallet', 'occurred_on': LOST_ON.isoformat(), 'description': 'black leather wallet',
+            'latitude': 38.7, 'longitude': -9.1}
+    lost = client.post('/items', headers=admin, json=dict(item, status='lost')).get_json()
+    for days in range(3):
+        client.post('/items', headers=admin, json=dict(item, status='found',
+                                                       occurred_on=(LOST_ON + timedelta(days=days)).isoformat()))
+    path = '/items/{}/matches'.format(lost['id'])
+    client.get(path, headers=admin)
+    with QueryCounter() as queries:
+        matches = client.get(path, headers=admin).get_json()
+    assert len(matches) == 3
+    assert matches[0]['found_item']['created_by']['name'] == 'Admin'
+    assert queries.count <= app.view_functions['lostandfound_app.list_item_matches'].query_budget
+
+
+def test_found_items_keep_the_matches_of_lost_items_as_a_rebuild_would(app, client, admin):
+    app.config.update(MATCH_MAX_RESULTS=2)
+    item = {'category': 'wallet', 'description': 'black leather wallet', 'latitude': 38.7, 'longitude': -9.1}
+    for days in (0, 2):
+        client.post('/items', headers=admin, json=dict(item, status='lost',
+                                                       occurred_on=(LOST_ON + timedelta(days=days)).isoformat()))
+    found = [client.post('/items', headers=admin, json=dict(item, status='found', occurred_on=(
+        LOST_ON + timedelta(days=days, hours=days)).isoformat())).get_json()['id'] for days in (9, 5, 1, 7, 3)]
+    headers = dict(admin, **{'If-Match': client.get('/items/{}'.format(found[2]), headers=admin).headers['ETag']})
+    client.put('/items/{}'.format(found[2]), headers=headers, json={'description': 'red umbrella'})
+    headers = dict(admin, **{'If-Match': client.get('/items/{}'.format(found[4]), headers=admin).headers['ETag']})
+    client.delete('/items/{}'.format(found[4]), headers=headers)
+
+    with app.app_context():
+        incremental = sorted((match.lost_item_id, match.found_item_id) for match in Match.query)
+        rebuild_matches()
+        assert sorted((match.lost_item_id, match.found_item_id) for match in Match.query) == incremental
+    assert len(incremental) == 4
@@ -0,0 +1,16 @@
+from tests.conftest import make_app
+
+
+def test_metrics_are_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_token_is_required(tmp_path):
+    app = make_app(tmp_path, METRICS_ENABLED=True, METRICS_TOKEN='scraper')
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scraper'})
+    assert response.status_code == 200
+    assert b'lostandfound_user_cache_hits' in response.data
@@ -0,0 +1,49 @@
+import base64
+import json
+
+from tests.conftest import create_user
+
+
+def _cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_total_count_is_opt_in(app, client, admin):
+    for number in range(3):
+        create_user(app, 'user{}@test.com'.format(number))
+    response = client.get('/users?per_page=2', headers=admin)
+    assert 'X-Total-Count' not in response.headers
+    assert 'X-Next-Cursor' in response.headers
+
+    response = client.get('/users?per_page=2&count=true', headers=admin)
+    assert response.headers['X-Total-Count'] == '4'
+    assert 'ETag' in response.headers
+
+
+def test_keyset_pages_cover_every_user_once(app, client, admin):
+    for number in range(5):
+        create_user(app, 'user{}@test.com'.format(number))
+    seen = []
+    cursor = ''
+    while True:
+        response = client.get('/users?per_page=2' + cursor, headers=admin)
+        seen += [user['id'] for user in response.get_json()]
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        cursor = '&cursor=' + response.headers['X-Next-Cursor']
+    assert sorted(seen) == list(range(1, 7))
+
+
+def test_pagination_headers_are_exposed_to_browsers(client, admin):
+    response = client.get('/users', headers=dict(admin, Origin='https://example.com'))
+    exposed = response.headers['Access-Control-Expose-Headers']
+    assert 'X-Next-Cursor' in exposed and 'X-Total-Count' in exposed
+
+
+def test_cursor_values_must_be_scalars_of_the_column_type(client, admin):
+    for values in (['Ana', {'id': 1}], [['Ana'], 1], ['Ana', 'one'], [1, 1], ['Ana', True], ['Ana'], 'Ana'):
+        response = client.get('/users?cursor=' + _cursor(values), headers=admin)
+        assert response.status_code == 400, values
+    assert client.get('/users?cursor=' + _cursor(['Ana', 1]), headers=admin).status_code == 200
+    assert client.get('/items?cursor=' + _cursor([{'a': 1}, 1]), headers=admin).status_code == 400
+    assert client.get('/items?cursor=' + _cursor(['2026-01-01T00:00:00', 1]), headers=admin).status_code == 200
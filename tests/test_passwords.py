@@ -0,0 +1,34 @@
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from auth.passwords import PasswordHasher
+
+PASSWORDS = ['one', 'two', 'three', 'four', 'five']
+
+
+def _hasher(**config):
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000', **config)
+    return PasswordHasher(app)
+
+
+def test_needs_rehash_compares_method_and_salt_length():
+    hasher = _hasher(PASSWORD_HASH_SALT_LENGTH=16)
+    assert not hasher.needs_rehash(hasher.hash('secret'))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:1000', salt_length=8))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:2000', salt_length=16))
+    assert hasher.needs_rehash('not a hash')
+
+
+def test_hash_many_gives_back_the_pool_slots():
+    hasher = _hasher(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=2)
+    hashes = hasher.hash_many(PASSWORDS)
+    assert all(hasher.check(pwhash, password) for pwhash, password in zip(hashes, PASSWORDS))
+    assert hasher._slots.acquire(blocking=False) and hasher._slots.acquire(blocking=False)
+
+
+def test_hash_many_without_workers_hashes_inline():
+    hasher = _hasher()
+    hashes = hasher.hash_many(PASSWORDS)
+    assert all(hasher.check(pwhash, password) for pwhash, password in zip(hashes, PASSWORDS))
+    assert hasher._pool is None
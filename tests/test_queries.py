@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from lostandfound.models import Item, ItemStatus
+from users.models import Role, User
+from utils.queries import QueryBudgetExceeded, QueryCounter
+
+
+def _add_rows(app, count, start):
+    # Every row points to the admin, so serializing created_by/updated_by would be one query per row if not eager
+    with app.app_context():
+        db.session.bulk_insert_mappings(User, [
+            dict(email='user{}@test.com'.format(number), name='User {}'.format(number), password='x',
+                 role=Role.regular, active=True, token_generation=0, created_by_id=1, updated_by_id=1)
+            for number in range(start, start + count)])
+        db.session.bulk_insert_mappings(Item, [
+            dict(status=ItemStatus.lost if number % 2 else ItemStatus.found, category='wallet',
+                 occurred_on=datetime(2026, 1, 1) + timedelta(hours=number), description='black leather wallet',
+                 latitude=38.7, longitude=-9.1, active=True, created_by_id=1, updated_by_id=1)
+            for number in range(start, start + count)])
+        db.session.commit()
+
+
+def _queries(client, admin, path):
+    with QueryCounter() as queries:
+        response = client.get(path, headers=admin)
+    assert response.status_code == 200, response.get_data()
+    return queries.count
+
+
+@pytest.mark.parametrize('path', [
+    '/users?per_page=50', '/users?per_page=50&count=true', '/users?per_page=50&page=1', '/users/2',
+    '/items?per_page=50', '/items?per_page=50&count=true', '/items?per_page=50&q=leather', '/items/1',
+])
+def test_queries_stay_within_budget_and_do_not_grow_with_the_rows(app, client, admin, path):
+    _add_rows(app, 5, 0)
+    # Once first, so the user is cached like on every later request
+    _queries(client, admin, path)
+    few = _queries(client, admin, path)
+    _add_rows(app, 40, 5)
+    # Strict budgets make the request fail when over budget
+    assert _queries(client, admin, path) == few
+
+
+def test_over_budget_requests_fail_in_tests(app, client, admin, monkeypatch):
+    monkeypatch.setattr(app.view_functions['users_app.list_users'], 'query_budget', 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/users', headers=admin)
+
+
+def test_over_budget_requests_are_only_logged_outside_tests(tmp_path, monkeypatch):
+    from tests.conftest import create_user, login, make_app
+
+    app = make_app(tmp_path, TESTING=False)
+    client = app.test_client()
+    create_user(app, 'admin@test.com', role='admin')
+    headers, _ = login(client, 'admin@test.com')
+    warnings = []
+    monkeypatch.setattr(app.logger, 'warning', lambda message: warnings.append(message))
+    monkeypatch.setattr(app.view_functions['users_app.list_users'], 'query_budget', 1)
+    assert client.get('/users', headers=headers).status_code == 200
+    assert warnings and warnings[0].startswith('users_app.list_users ran')
@@ -0,0 +1,46 @@
+from tests.conftest import make_app
+
+LIMITED = dict(RATELIMIT_ENABLED=True, RATELIMIT_REGISTER_IP='2/minute')
+
+
+def _register(client, number, forwarded_for=None):
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    return client.post('/users', headers=headers, json={
+        'name': 'User', 'role': 'regular', 'email': 'user{}@test.com'.format(number), 'password': 'secret'})
+
+
+def test_clients_behind_a_trusted_proxy_are_limited_apart(tmp_path):
+    app = make_app(tmp_path, RATELIMIT_TRUSTED_PROXIES=1, **LIMITED)
+    client = app.test_client()
+    for number in range(2):
+        assert _register(client, number, '203.0.113.1').status_code == 201
+    response = _register(client, 2, '203.0.113.1')
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+    # A spoofed entry further left is ignored, only the one added by the proxy counts
+    assert _register(client, 3, '198.51.100.7, 203.0.113.1').status_code == 429
+    assert _register(client, 4, '203.0.113.2').status_code == 201
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(tmp_path):
+    client = make_app(tmp_path, **LIMITED).test_client()
+    for number in range(2):
+        assert _register(client, number, '203.0.113.{}'.format(number)).status_code == 201
+    assert _register(client, 2, '203.0.113.2').status_code == 429
+
+
+def test_limits_are_kept_per_app(tmp_path):
+    (tmp_path / 'first').mkdir()
+    (tmp_path / 'second').mkdir()
+    first = make_app(tmp_path / 'first', **LIMITED)
+    second = make_app(tmp_path / 'second', RATELIMIT_ENABLED=True, RATELIMIT_REGISTER_IP='5/minute')
+    client = first.test_client()
+    for number in range(2):
+        assert _register(client, number).status_code == 201
+    assert _register(client, 2).status_code == 429
+    assert first.extensions['rate_limiter'].limits['RATELIMIT_REGISTER_IP'].count == 2
+
+    client = second.test_client()
+    for number in range(5):
+        assert _register(client, number).status_code == 201
+    assert second.extensions['rate_limiter'].limits['RATELIMIT_REGISTER_IP'].count == 5
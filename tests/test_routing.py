@@ -0,0 +1,73 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from app import db
+from lostandfound.models import Item, ItemStatus
+from tests.conftest import create_user, login, make_app
+
+ITEM = {'status': 'found', 'category': 'keys', 'occurred_on': '2026-02-01', 'description': 'keys'}
+
+
+def _copy(source, target):
+    with sqlite3.connect(source) as primary, sqlite3.connect(target) as replica:
+        primary.backup(replica)
+
+
+def _descriptions(response):
+    assert response.status_code == 200
+    return {item['description'] for item in response.get_json()}
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """An app whose replica is a copy of the primary taken once the users exist, then left behind."""
+    replica = tmp_path / 'replica.db'
+    app = make_app(tmp_path, JWT_REVOCATION_BACKEND='database',
+                   SQLALCHEMY_BINDS={'replica': 'sqlite:///' + str(replica)})
+    create_user(app, 'writer@test.com')
+    create_user(app, 'reader@test.com')
+    with app.app_context():
+        db.session.add(Item(status=ItemStatus.found, category='keys', occurred_on=datetime(2026, 2, 1),
+                            description='replicated'))
+        db.session.commit()
+    _copy(str(tmp_path / 'test.db'), str(replica))
+    return app
+
+
+def test_read_only_views_read_the_replica(replicated):
+    client = replicated.test_client()
+    headers, _ = login(client, 'reader@test.com')
+    with replicated.app_context():
+        db.session.add(Item(status=ItemStatus.found, category='keys', occurred_on=datetime(2026, 2, 1),
+                            description='not replicated'))
+        db.session.commit()
+
+    assert _descriptions(client.get('/items', headers=headers)) == {'replicated'}
+
+
+def test_writers_read_their_own_writes(replicated):
+    client = replicated.test_client()
+    writer, _ = login(client, 'writer@test.com')
+    reader, _ = login(client, 'reader@test.com')
+    assert client.post('/items', headers=writer, json=dict(ITEM, description='written')).status_code == 201
+
+    assert _descriptions(client.get('/items', headers=writer)) == {'replicated', 'written'}
+    assert _descriptions(client.get('/items', headers=reader)) == {'replicated'}
+
+
+def test_revocations_are_read_from_the_primary(replicated):
+    client = replicated.test_client()
+    headers, _ = login(client, 'reader@test.com')
+    assert client.delete('/auth/logout', headers=headers).status_code == 200
+
+    assert client.get('/items', headers=headers).status_code == 401
+
+
+def test_users_are_loaded_from_the_primary(replicated):
+    client = replicated.test_client()
+    create_user(replicated, 'new@test.com')
+    headers, _ = login(client, 'new@test.com')
+
+    assert _descriptions(client.get('/items', headers=headers)) == {'replicated'}
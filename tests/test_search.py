@@ -0,0 +1,71 @@
+import pytest
+
+ITEMS = [
+    {'status': 'lost', 'category': 'wallet', 'occurred_on': '2026-03-01', 'description': 'black leather wallet',
+     'latitude': 38.7, 'longitude': -9.1},
+    {'status': 'found', 'category': 'wallet', 'occurred_on': '2026-03-05', 'description': 'wallet wallet',
+     'latitude': 41.1, 'longitude': -8.6},
+    {'status': 'found', 'category': 'keys', 'occurred_on': '2026-03-10', 'description': 'keys with a wallet charm',
+     'latitude': 38.7, 'longitude': -9.2},
+    {'status': 'lost', 'category': 'phone', 'occurred_on': '2026-04-01', 'description': 'cracked phone',
+     'latitude': 37.0, 'longitude': -7.9},
+]
+
+
+@pytest.fixture
+def items(client, admin):
+    return [client.post('/items', headers=admin, json=item).get_json()['id'] for item in ITEMS]
+
+
+def _ids(client, admin, query):
+    response = client.get('/items?' + query, headers=admin)
+    assert response.status_code == 200
+    return [item['id'] for item in response.get_json()]
+
+
+def test_filters(client, admin, items):
+    assert _ids(client, admin, 'status=lost') == [items[3], items[0]]
+    assert _ids(client, admin, 'category=%20WALLET%20') == [items[1], items[0]]
+    assert _ids(client, admin, 'from=2026-03-05&to=2026-03-10') == [items[2], items[1]]
+    assert _ids(client, admin, 'min_lat=38&max_lat=39&min_lon=-9.15&max_lon=-9') == [items[0]]
+    # Empty filters are no filters
+    assert len(_ids(client, admin, 'status=&max_lon=&q=')) == 4
+
+
+@pytest.mark.parametrize('query', ['status=stolen', 'from=yesterday-ish', 'to=2026-13-45', 'min_lat=north', 'q=***'])
+def test_invalid_filters_are_rejected(client, admin, items, query):
+    assert client.get('/items?' + query, headers=admin).status_code == 422
+
+
+def test_invalid_item_values_are_rejected(client, admin):
+    for values in ({'category': '  '}, {'category': 7}, {'occurred_on': 'soon'}, {'latitude': 91},
+                   {'longitude': 'west'}, {'status': 'stolen'}):
+        assert client.post('/items', headers=admin, json=dict(ITEMS[0], **values)).status_code == 422
+
+
+def test_search_is_ranked_and_highlighted(client, admin, items):
+    response = client.get('/items?q=wallet', headers=admin)
+    results = response.get_json()
+    assert [item['id'] for item in results][0] == items[1]
+    assert sorted(item['id'] for item in results) == sorted(items[:3])
+    assert all('<mark>wallet</mark>' in item['snippet'] for item in results)
+
+
+def test_search_pages_with_a_cursor(client, admin, items):
+    first = _ids(client, admin, 'q=wallet')
+    seen = []
+    cursor = ''
+    while True:
+        response = client.get('/items?q=wallet&per_page=1' + cursor, headers=admin)
+        seen += [item['id'] for item in response.get_json()]
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        cursor = '&cursor=' + response.headers['X-Next-Cursor']
+    assert seen == first
+
+
+def test_search_with_filters_and_count(client, admin, items):
+    response = client.get('/items?q=wallet&status=found&min_lon=-9&count=true', headers=admin)
+    assert [item['id'] for item in response.get_json()] == [items[1]]
+    assert response.headers['X-Total-Count'] == '1'
+    assert 'ETag' in response.headers
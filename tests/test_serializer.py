@@ -0,0 +1,56 @@
+import pytest
+from flask import jsonify
+
+from lostandfound.models import Item, Match
+from lostandfound.schemas import item_schema, items_schema, matches_schema
+from tests.test_uploads import jpeg
+from users.models import User
+from users.schemas import user_export_schema, user_schema, users_schema
+from utils.serializer import dump, json_response
+
+SCHEMAS = {
+    'user': (user_schema, User),
+    'users': (users_schema, User),
+    'user_export': (user_export_schema, User),
+    'item': (item_schema, Item),
+    'items': (items_schema, Item),
+    'matches': (matches_schema, Match),
+}
+ITEMS = [
+    {'status': 'lost', 'category': 'wallet', 'occurred_on': '2026-03-01', 'description': 'black leather wallet',
+     'latitude': 38.7, 'longitude': -9.1},
+    {'status': 'found', 'category': 'wallet', 'occurred_on': '2026-03-02', 'description': 'leather wallet',
+     'latitude': 38.71, 'longitude': -9.11},
+    {'status': 'found', 'category': 'keys', 'occurred_on': '2026-03-10', 'description': 'keys'},
+]
+
+
+@pytest.fixture
+def records(app, client, admin):
+    user = client.post('/users', headers=admin, json={
+        'name': 'User', 'role': 'regular', 'email': 'user@test.com', 'password': 'secret'}).get_json()
+    client.put('/users/{}'.format(user['id']), headers=admin, json={'name': 'Edited', 'email': 'user@test.com'})
+    ids = [client.post('/items', headers=admin, json=item).get_json()['id'] for item in ITEMS]
+    assert client.put('/items/{}/image'.format(ids[0]), headers=admin, data=jpeg(), content_type='image/jpeg') \
+        .status_code == 200
+    client.put('/items/{}'.format(ids[1]), headers=admin, json=dict(ITEMS[1], description='brown leather wallet'))
+    assert client.get('/items/{}/matches'.format(ids[0]), headers=admin).get_json()
+    app.config['IMAGE_DERIVATIVE_SIZES'] = {'thumb': 160, 'small': 480}
+
+
+@pytest.mark.parametrize('encoder', ['flask', 'orjson'])
+@pytest.mark.parametrize('name', sorted(SCHEMAS))
+def test_dump_is_identical_to_marshmallow_and_jsonify(app, records, name, encoder):
+    if encoder == 'orjson':
+        pytest.importorskip('orjson')
+    app.config['JSON_ENCODER'] = encoder
+    schema, model = SCHEMAS[name]
+    with app.test_request_context():
+        objs = model.query.order_by(model.id).all()
+        assert objs
+        cases = [objs] if schema.many else objs
+        for obj in cases:
+            data = dump(schema, obj)
+            assert data == schema.dump(obj)
+            # The data is ASCII and has no floats with exponents, so orjson writes the same bytes
+            assert json_response(data).get_data() == jsonify(schema.dump(obj)).get_data()
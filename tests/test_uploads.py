@@ -0,0 +1,71 @@
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from tests.conftest import create_user, login, make_app
+
+ITEM = {'status': 'lost', 'category': 'wallet', 'occurred_on': '2026-03-01', 'description': 'black wallet'}
+
+
+def jpeg():
+    output = io.BytesIO()
+    Image.new('RGB', (40, 30), (200, 120, 40)).save(output, 'JPEG')
+    return output.getvalue()
+
+
+def stored_files(app):
+    directory = app.config['LOSTANDFOUND_IMAGES_FILE_PATH']
+    return sorted(name for _, _, files in os.walk(directory) for name in files)
+
+
+@pytest.fixture
+def item_path(client, admin):
+    return '/items/{}/image'.format(client.post('/items', headers=admin, json=ITEM).get_json()['id'])
+
+
+def test_raw_and_multipart_uploads_store_the_same_content_once(app, client, admin, item_path):
+    content = jpeg()
+    name = '{}.jpg'.format(hashlib.sha256(content).hexdigest())
+    raw = client.put(item_path, headers=admin, data=content, content_type='image/png')
+    assert raw.status_code == 200
+    assert raw.get_json()['image'].endswith('/' + name)
+
+    other = '/items/{}/image'.format(client.post('/items', headers=admin, json=ITEM).get_json()['id'])
+    form = client.put(other, headers=admin, content_type='multipart/form-data',
+                      data={'image': (io.BytesIO(content), 'wallet.jpg')})
+    assert form.status_code == 200
+    assert form.get_json()['image'] == raw.get_json()['image']
+    assert stored_files(app) == [name]
+    assert os.path.exists(os.path.join(app.config['LOSTANDFOUND_IMAGES_FILE_PATH'], name[:2], name[2:4], name))
+
+
+@pytest.mark.parametrize('body', [b'<html>not an image</html>', b''])
+def test_bodies_that_are_not_images_are_rejected(app, client, admin, item_path, body):
+    response = client.put(item_path, headers=admin, data=body, content_type='image/jpeg')
+    assert response.status_code == 415
+    assert stored_files(app) == []
+
+
+def test_multipart_uploads_need_the_image_field(app, client, admin, item_path):
+    response = client.put(item_path, headers=admin, content_type='multipart/form-data',
+                          data={'photo': (io.BytesIO(jpeg()), 'wallet.jpg')})
+    assert response.status_code == 415
+    assert stored_files(app) == []
+
+
+def test_uploads_over_the_limit_are_rejected_while_streaming(tmp_path):
+    app = make_app(tmp_path, IMAGE_MAX_SIZE=1000, IMAGE_CHUNK_SIZE=256)
+    client = app.test_client()
+    create_user(app, 'admin@test.com', role='admin')
+    admin, _ = login(client, 'admin@test.com')
+    path = '/items/{}/image'.format(client.post('/items', headers=admin, json=ITEM).get_json()['id'])
+    body = b'\xff\xd8\xff\xe0' + b'\0' * 2000
+
+    # Declared small enough to get past the Content-Length check, the stream is still cut at the limit
+    assert client.put(path, headers=admin, data=body, content_type='image/jpeg').status_code == 413
+    assert client.put(path, headers=admin, data=body + b'\0' * 70000, content_type='image/jpeg') \
+        .status_code == 413
+    assert stored_files(app) == []
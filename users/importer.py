@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from sqlalchemy.exc import IntegrityError
+
+from app import counters, db, password_hasher
+from users.models import User, Role
+
+IMPORT_FORMATS = ('json', 'ndjson', 'csv')
+REQUIRED_FIELDS = ('email', 'name', 'password', 'role')
+
+
+def read_rows(stream, import_format):
+    """Yields one dict per user from a text stream."""
+    if import_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif import_format == 'ndjson':
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    else:
+        rows = json.load(stream)
+        if not isinstance(rows, list):
+            raise ValueError('Expected a JSON array of users')
+        yield from rows
+
+
+def import_users(rows, batch_size=500):
+    """
+    Creates users in batches. Each batch costs one query to find existing
+    emails, one round of password hashing spread over a process pool and a
+    single executemany insert. Invalid rows are skipped and reported. If
+    another request creates one of the emails meanwhile, the batch is
+    retried row by row and the duplicates are reported.
+    """
+    started = time.monotonic()
+    imported = 0
+    total = 0
+    errors = []
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        valid = []
+        seen = set()
+        existing = _existing_emails(row.get('email') for row in batch if isinstance(row, dict))
+        for number, row in enumerate(batch, total + 1):
+            message = _validate(row, existing, seen)
+            if message:
+                errors.append(_error(number, row, message))
+            else:
+                seen.add(row['email'])
+                valid.append((number, row))
+        total += len(batch)
+        if not valid:
+            continue
+        hashes = password_hasher.hash_many([row['password'] for number, row in valid])
+        users = [(number, row, {'email': row['email'], 'name': row['name'], 'password': password_hash,
+                                'role': Role(row['role'])})
+                 for (number, row), password_hash in zip(valid, hashes)]
+        try:
+            imported += _insert([user for number, row, user in users])
+        except IntegrityError:
+            db.session.rollback()
+            for number, row, user in users:
+                try:
+                    imported += _insert([user])
+                except IntegrityError:
+                    db.session.rollback()
+                    errors.append(_error(number, row, 'That email already exists.'))
+    elapsed = time.monotonic() - started
+    return {
+        'rows': total,
+        'imported': imported,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(total / elapsed, 1) if elapsed else None,
+    }
+
+
+def import_stream(stream, import_format, batch_size=500):
+    """Imports users from a binary stream (request body or file)."""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return import_users(read_rows(text, import_format), batch_size)
+
+
+def _insert(users):
+    db.session.bulk_insert_mappings(User, users)
+    # Bulk inserts skip the mapper events that keep the counters
+    counters.add('users.active', '', len(users))
+    db.session.commit()
+    return len(users)
+
+
+def _error(number, row, message):
+    email = row.get('email') if isinstance(row, dict) else None
+    return {'row': number, 'email': email if isinstance(email, str) else None, 'message': message}
+
+
+def _validate(row, existing, seen):
+    if not isinstance(row, dict):
+        return 'Row must be an object'
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        return 'Missing fields: {}'.format(', '.join(missing))
+    invalid = [field for field in REQUIRED_FIELDS if not isinstance(row[field], str)]
+    if invalid:
+        return 'Fields must be strings: {}'.format(', '.join(invalid))
+    if row['role'] not in set(item.value for item in Role):
+        return 'The role provided does not exist'
+    if row['email'] in existing or row['email'] in seen:
+        return 'That email already exists.'
+    return None
+
+
+def _existing_emails(emails):
+    emails = [email for email in emails if email and isinstance(email, str)]
+    if not emails:
+        return set()
+    return set(email for email, in db.session.query(User.email).filter(User.email.in_(emails)))
+
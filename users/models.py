@@ -1,6 +1,8 @@
 from enum import Enum
 
-from app import db
+from sqlalchemy.orm.attributes import NO_VALUE
+
+from app import counters, db
 from utils.models import BaseModel
 
 
@@ -10,9 +12,26 @@ class Role(Enum):
 
 
 class User(BaseModel):
+    __table_args__ = (
+        db.Index('ix_user_active_name_id', 'active', 'name', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     email = db.Column(db.String, unique=True, nullable=False)
-    password = db.Column(db.String(94), nullable=False)
+    # Long enough for stronger PASSWORD_HASH_METHOD and PASSWORD_HASH_SALT_LENGTH settings, e.g. pbkdf2:sha512 hashes
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum(Role), nullable=False)
     active = db.Column(db.Boolean, nullable=False, default=True)
+    token_generation = db.Column(db.Integer, nullable=False, default=0)
+
+
+@db.event.listens_for(User.role, 'set', active_history=True)
+def revoke_tokens_on_role_change(target, value, oldvalue, initiator):
+    # Tokens may carry the role as a claim, so they must not outlive it. Only ORM changes get here, role
+    # updates made with bulk queries or raw SQL must bump token_generation themselves.
+    if db.inspect(target).persistent and oldvalue not in (NO_VALUE, None) and value != oldvalue:
+        target.token_generation = User.token_generation + 1
+
+
+counters.register('users.active', User, ['active'], lambda active: '' if active else None)
@@ -9,10 +9,11 @@ class UserSchema(SQLAlchemyAutoSchema):
         model = User
         include_relationships = True
         load_instance = True
-        exclude = ("password",)
+        exclude = ("password", "token_generation", "version")
 
     role = EnumField(Role)
 
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
+user_export_schema = UserSchema(exclude=("created_by", "updated_by"))
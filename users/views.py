@@ -1,16 +1,32 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, jwt_optional, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from app import db, blacklist, users_tokens
+from app import counters, db, user_cache, password_hasher
 from auth.utils import role_required
+from users.importer import import_stream
 from users.models import User, Role
-from users.schemas import users_schema, user_schema
+from users.schemas import users_schema, user_schema, user_export_schema
+from utils.conditional import collection_validators, not_modified, precondition_failed, resource_validators, \
+    set_validators
+from utils.export import EXPORT_FORMATS, export_response
+from utils.pagination import get_per_page, keyset_paginate, with_total_count
+from utils.queries import query_budget
+from utils.ratelimit import rate_limit
+from utils.routing import read_only
+from utils.serializer import dump, json_response
+from utils.schemas import eager_load_options
 
 users_app = Blueprint('users_app', __name__, url_prefix='/users')
 
+IMPORT_CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'text/csv': 'csv',
+}
+
 
 @users_app.route('/data', methods=['GET'])
+@read_only
 @role_required(Role.admin)
 def get_data():
     """
@@ -22,11 +38,13 @@ def get_data():
         200:
             description: Returns a list of restaurants
     """
-    users = User.query.filter_by(active=True).count()
+    users = counters.get('users.active')
     return jsonify(users=users)
 
 
 @users_app.route('', methods=['GET'])
+@read_only
+@query_budget(6)
 @role_required(Role.admin)
 def list_users():
     """
@@ -34,17 +52,104 @@ def list_users():
     ---
     tags:
         - Users
+    parameters:
+        - in: query
+          name: cursor
+          description: Cursor returned in the X-Next-Cursor header of the previous page
+        - in: query
+          name: page
+          description: Page number (offset pagination, used when no cursor is given)
+        - in: query
+          name: per_page
+        - in: query
+          name: count
+          description: Set to true to get the X-Total-Count header and the ETag/Last-Modified validators
     responses:
         200:
             description: Returns a list of users
+        304:
+            description: The list did not change since the If-None-Match/If-Modified-Since validators
     """
-    page = int(request.args.get('page', 1))
-    users_list = User.query.filter_by(active=True).order_by(User.name).paginate(page=page, per_page=10, error_out=False)
-    result = users_schema.dump(users_list.items)
-    return jsonify(result)
+    per_page = get_per_page()
+    query = User.query.filter_by(active=True)
+    cursor = request.args.get('cursor')
+    page = request.args.get('page', type=int)
+    with_count = with_total_count()
+    if with_count:
+        etag, last_modified, count = collection_validators(query, User, cursor, page, per_page)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+    next_cursor = None
+    page_query = query.options(*eager_load_options(users_schema))
+    if page and not cursor:
+        users_list = page_query.order_by(User.name, User.id).offset((max(page, 1) - 1) * per_page).limit(per_page).all()
+    else:
+        users_list, next_cursor = keyset_paginate(page_query, [User.name, User.id], cursor, per_page)
+    response = json_response(dump(users_schema, users_list))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    if with_count:
+        response.headers['X-Total-Count'] = count
+        set_validators(response, etag, last_modified)
+    return response
+
+
+@users_app.route('/export', methods=['GET'])
+@read_only
+@role_required(Role.admin)
+def export_users():
+    """
+    Exports all active users
+    ---
+    tags:
+        - Users
+    parameters:
+        - in: query
+          name: format
+          description: ndjson (default) or csv
+    responses:
+        200:
+            description: Streams every active user, one per line
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify(message='The export format provided does not exist'), 422
+    query = User.query.filter_by(active=True).order_by(User.id)
+    return export_response(query, user_export_schema, export_format, 'users')
+
+
+@users_app.route('/import', methods=['POST'])
+@rate_limit('RATELIMIT_IMPORT_IDENTITY', by='identity')
+@role_required(Role.admin)
+def import_users():
+    """
+    Imports users in bulk
+    ---
+    tags:
+        - Users
+    parameters:
+        - in: body
+          name: Users
+          description: JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) with email, name, password and role
+    responses:
+        200:
+            description: Returns the import report with per-row errors
+    """
+    import_format = IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if not import_format:
+        return jsonify(message='The content type provided is not supported'), 415
+    try:
+        report = import_stream(request.stream, import_format,
+                               batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 500))
+    except ValueError as e:
+        return jsonify(message='Invalid import file: {}'.format(e)), 400
+    return jsonify(report)
 
 
 @users_app.route('/<int:user_id>', methods=['GET'])
+@read_only
+@query_budget(5)
 @role_required(Role.admin)
 def get_user(user_id):
     """
@@ -58,11 +163,17 @@ def get_user(user_id):
     responses:
         200:
             description: Returns an user instance
+        304:
+            description: The user did not change since the If-None-Match/If-Modified-Since validators
     """
     user = User.query.filter_by(id=user_id, active=True).first()
     if user:
-        result = user_schema.dump(user)
-        return jsonify(result)
+        etag, last_modified = resource_validators(user)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+        result = dump(user_schema, user)
+        return set_validators(json_response(result), etag, last_modified)
     else:
         return jsonify(message="User does not exist"), 404
 
@@ -83,29 +194,32 @@ def edit_user(user_id):
     responses:
         200:
             description: User edited
+        412:
+            description: The If-Match header does not match the current user ETag
     """
     user = User.query.filter_by(id=user_id, active=True).first()
     if user:
+        failed = precondition_failed(resource_validators(user)[0])
+        if failed:
+            return failed
         # Only allow to change name and e-mail
         user.name = request.json.get('name')
         old_email = user.email
         user.email = request.json.get('email')
         password = request.json.get('password')
         if password and len(password) > 0:
-            user.password = generate_password_hash(password)
-            access_tokens = [kv['access_token'] for kv in users_tokens[old_email]]
-            refresh_tokens = [kv['refresh_token'] for kv in users_tokens[old_email]]
-            blacklist.update(access_tokens)
-            blacklist.update(refresh_tokens)
-            users_tokens[old_email] = []
+            user.password = password_hasher.hash(password)
+            user.token_generation = User.token_generation + 1
         db.session.commit()
+        user_cache.invalidate(old_email, user.email)
         result = user_schema.dump(user)
-        return jsonify(result)
+        return set_validators(jsonify(result), *resource_validators(user))
     else:
         return jsonify(message="User does not exist"), 404
 
 
 @users_app.route('/<int:user_id>/change-password', methods=['PUT'])
+@rate_limit('RATELIMIT_PASSWORD_IDENTITY', by='identity')
 @jwt_required
 def change_password(user_id):
     """
@@ -130,23 +244,20 @@ def change_password(user_id):
             return jsonify(message="You can only change your own password"), 403
         password = request.json['password']
         new_password = request.json['new_password']
-        if not check_password_hash(user.password, password):
+        if not password_hasher.check(user.password, password):
             return jsonify(message="The current password is not correct"), 403
-        user.password = generate_password_hash(new_password)
+        user.password = password_hasher.hash(new_password)
+        user.token_generation = User.token_generation + 1
         db.session.commit()
+        user_cache.invalidate(logged_email)
         result = user_schema.dump(user)
-        if logged_email in users_tokens:
-            access_tokens = [kv['access_token'] for kv in users_tokens[logged_email]]
-            refresh_tokens = [kv['refresh_token'] for kv in users_tokens[logged_email]]
-            blacklist.update(access_tokens)
-            blacklist.update(refresh_tokens)
-            users_tokens[logged_email] = []
         return jsonify(result)
     else:
         return jsonify(message="User does not exist"), 404
 
 
 @users_app.route('', methods=['POST'])
+@rate_limit('RATELIMIT_REGISTER_IP', by='ip')
 @jwt_optional
 def register():
     """
@@ -176,9 +287,10 @@ def register():
             logged_user = current_user
             if not logged_user or logged_user.role != Role.admin:
                 return jsonify(message='Only admin users can create other admin users'), 403
-        user = User(name=name, email=email, password=generate_password_hash(password), role=role_obj)
+        user = User(name=name, email=email, password=password_hasher.hash(password), role=role_obj)
         db.session.add(user)
         db.session.commit()
+        user_cache.invalidate(email)
         result = user_schema.dump(user)
         return jsonify(result), 201
 
@@ -197,14 +309,20 @@ def delete_user(user_id):
     responses:
         200:
             description: User deleted
+        412:
+            description: The If-Match header does not match the current user ETag
     """
     user = User.query.filter_by(id=user_id, active=True).first()
     logged_email = get_jwt_identity()
     if user:
+        failed = precondition_failed(resource_validators(user)[0])
+        if failed:
+            return failed
         if user.email == logged_email:
             return jsonify(message="User can't delete himself"), 403
         user.active = False
         db.session.commit()
+        user_cache.invalidate(user.email)
         return jsonify(message="User deleted")
     else:
         return jsonify(message="User does not exist"), 404
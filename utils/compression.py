@@ -0,0 +1,79 @@
+import time
+import zlib
+
+from flask import current_app, request
+
+from utils.metrics import timed
+
+# zlib window bits of each Content-Encoding: gzip wraps the deflate stream in a gzip header,
+# HTTP's deflate is the zlib format
+ENCODINGS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def init_compression(app):
+    """
+    Compresses responses with gzip or deflate, as negotiated from
+    ``Accept-Encoding``, when their mimetype is in ``COMPRESS_MIMETYPES``
+    and their body has at least ``COMPRESS_MIN_SIZE`` bytes. Streamed
+    responses (exports) are compressed chunk by chunk, each chunk flushed so
+    the client still gets every batch as it is sent.
+
+    A compressed response is a different representation, so its ETag gets
+    the encoding as a suffix (``"<etag>-gzip"``); ``utils.conditional``
+    strips it before comparing ``If-Match`` and ``If-None-Match``. The time
+    spent compressing is the ``compression`` phase of the request metrics,
+    recorded once the body is sent for streamed responses.
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ('application/json',)))
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code < 200 or response.status_code in (204, 206, 304) or response.direct_passthrough \
+                or 'Content-Encoding' in response.headers or response.cache_control.no_transform:
+            return response
+        encoding = request.accept_encodings.best_match(list(ENCODINGS))
+        if not encoding:
+            return response
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding, level,
+                                                 current_app.extensions.get('metrics'), request.endpoint)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            with timed('compression'):
+                compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+                response.set_data(compressor.compress(body) + compressor.flush())
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag('{}-{}'.format(etag, encoding), weak)
+        return response
+
+
+def _compress_stream(chunks, encoding, level, metrics, endpoint):
+    # Runs while the body is sent, after the request metrics were recorded
+    compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+    spent = 0.0
+    try:
+        for chunk in chunks:
+            start = time.perf_counter()
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            spent += time.perf_counter() - start
+            if data:
+                yield data
+        start = time.perf_counter()
+        data = compressor.flush()
+        spent += time.perf_counter() - start
+        yield data
+    finally:
+        if metrics is not None:
+            metrics.observe_phase(endpoint, 'compression', spent)
@@ -0,0 +1,68 @@
+import hashlib
+
+from flask import current_app, jsonify, request
+from sqlalchemy import func
+
+from utils.compression import ENCODINGS
+
+
+def resource_validators(obj):
+    """ETag and Last-Modified of a ``BaseModel`` row, from its id and ``version``, and ``updated_on``."""
+    return _etag(obj.__tablename__, obj.id, obj.version), obj.updated_on
+
+
+def collection_validators(query, model, *extra):
+    """
+    ETag and Last-Modified of every row matched by ``query``, from
+    max(``updated_on``), the sum of the versions and the row count. ``extra``
+    (e.g. paging arguments) is folded into the ETag. Also returns the count.
+    """
+    last_modified, versions, count = query.with_entities(func.max(model.updated_on), func.sum(model.version),
+                                                         func.count()).order_by(None).one()
+    return _etag(model.__tablename__, last_modified, versions, count, *extra), last_modified, count
+
+
+def not_modified(etag, last_modified):
+    """Returns a 304 response if the client's copy is current, otherwise ``None``."""
+    if request.if_none_match:
+        matched = _matching_tag(request.if_none_match, etag)
+        fresh = matched is not None
+        # The 304 carries the tag of the representation the client holds, compressed or not
+        etag = matched or etag
+    elif request.if_modified_since and last_modified:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return set_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def precondition_failed(etag):
+    """Returns a 412 response if an If-Match header does not match ``etag``."""
+    if request.if_match and _matching_tag(request.if_match, etag) is None:
+        return jsonify(message='The resource was modified by someone else'), 412
+    return None
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+def _matching_tag(etags, etag):
+    """The tag of an If-Match/If-None-Match header equal to ``etag`` once its encoding suffix is stripped."""
+    if etags.star_tag:
+        return etag
+    for tag in etags.as_set():
+        base, _, encoding = tag.rpartition('-')
+        if tag == etag or encoding in ENCODINGS and base == etag:
+            return tag
+    return None
+
+
+def _etag(*parts):
+    key = ':'.join(str(part) for part in parts)
+    return hashlib.sha1(key.encode()).hexdigest()
@@ -0,0 +1,144 @@
+import time
+from threading import Lock
+
+from sqlalchemy import event, func, inspect, text
+
+UPSERT = text("INSERT INTO counter (name, key, value) VALUES (:name, :key, :delta) "
+              "ON CONFLICT (name, key) DO UPDATE SET value = value + excluded.value")
+
+
+class CounterDefinition:
+    def __init__(self, name, model, columns, key):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.key = key
+
+    def current_key(self, target):
+        return self.key(*[getattr(target, column) for column in self.columns])
+
+    def changed(self, target):
+        state = inspect(target)
+        return any(state.attrs[column].history.has_changes() for column in self.columns)
+
+    def previous_key(self, target):
+        values = []
+        for column in self.columns:
+            history = inspect(target).attrs[column].history
+            if history.deleted:
+                values.append(history.deleted[0])
+            else:
+                values.append(getattr(target, column))
+        return self.key(*values)
+
+
+class Counters:
+    """
+    Row counts kept in the ``counter`` table, so reading one is a primary key
+    lookup instead of a table scan. A counter is registered for a model with
+    the columns it depends on and a function turning their values into the
+    counter key (``None`` when the row is not counted), e.g. items by status
+    and category::
+
+        counters.register('items', Item, ['active', 'status', 'category'],
+                          lambda active, status, category: '{}:{}'.format(status.value, category) if active else None)
+
+    Mapper events update the counts in the same transaction as the rows.
+    Writes that skip the events (bulk inserts, raw SQL) must call ``add``, and
+    every ``COUNTERS_RECONCILE_INTERVAL`` seconds a read recomputes the
+    counter from the table to repair any drift.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = None
+        self.counter_model = None
+        self.reconcile_interval = 300
+        self.definitions = {}
+        self._reconciled_on = {}
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        from utils.models import Counter
+
+        self.db = db
+        self.counter_model = Counter
+        self.reconcile_interval = app.config.get('COUNTERS_RECONCILE_INTERVAL', 300)
+
+    def register(self, name, model, columns, key):
+        definition = CounterDefinition(name, model, columns, key)
+        self.definitions[name] = definition
+        event.listen(model, 'after_insert', self._inserted(definition))
+        event.listen(model, 'after_update', self._updated(definition))
+        event.listen(model, 'after_delete', self._deleted(definition))
+
+    def get(self, name, key=''):
+        self._reconcile_if_due(name)
+        value = self.db.session.query(self.counter_model.value).filter_by(name=name, key=key).scalar()
+        return value or 0
+
+    def get_all(self, name):
+        self._reconcile_if_due(name)
+        query = self.db.session.query(self.counter_model.key, self.counter_model.value).filter_by(name=name)
+        return dict((key, value) for key, value in query if value)
+
+    def add(self, name, key, delta, connection=None):
+        """Adds ``delta`` to a counter in the current transaction."""
+        (connection or self.db.session).execute(UPSERT, {'name': name, 'key': key, 'delta': delta})
+
+    def reconcile(self, name):
+        """Recomputes a counter from its table, in a transaction of its own on the primary."""
+        definition = self.definitions[name]
+        table = definition.model.__table__
+        columns = [table.c[column] for column in definition.columns]
+        with self.db.engine.begin() as connection:
+            # Write first so SQLite takes the write lock before the counts are read
+            connection.execute(self.counter_model.__table__.delete().where(self.counter_model.name == name))
+            counts = {}
+            for row in connection.execute(self.db.select(columns + [func.count()]).group_by(*columns)):
+                key = definition.key(*row[:-1])
+                if key is not None:
+                    counts[key] = counts.get(key, 0) + row[-1]
+            if counts:
+                connection.execute(self.counter_model.__table__.insert(),
+                                   [{'name': name, 'key': key, 'value': value} for key, value in counts.items()])
+        with self._lock:
+            self._reconciled_on[name] = time.monotonic()
+
+    def _reconcile_if_due(self, name):
+        with self._lock:
+            reconciled_on = self._reconciled_on.get(name)
+            due = reconciled_on is None or time.monotonic() - reconciled_on >= self.reconcile_interval
+            if due:
+                # Claimed now so concurrent readers don't reconcile too
+                self._reconciled_on[name] = time.monotonic()
+        if due:
+            self.reconcile(name)
+
+    def _inserted(self, definition):
+        def after_insert(mapper, connection, target):
+            key = definition.current_key(target)
+            if key is not None:
+                self.add(definition.name, key, 1, connection)
+        return after_insert
+
+    def _updated(self, definition):
+        def after_update(mapper, connection, target):
+            if not definition.changed(target):
+                return
+            previous, current = definition.previous_key(target), definition.current_key(target)
+            if previous == current:
+                return
+            if previous is not None:
+                self.add(definition.name, previous, -1, connection)
+            if current is not None:
+                self.add(definition.name, current, 1, connection)
+        return after_update
+
+    def _deleted(self, definition):
+        def after_delete(mapper, connection, target):
+            key = definition.previous_key(target)
+            if key is not None:
+                self.add(definition.name, key, -1, connection)
+        return after_delete
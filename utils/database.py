@@ -0,0 +1,55 @@
+from functools import partial
+
+from sqlalchemy import event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def init_database(app, db):
+    """
+    Tunes the SQLite engines of ``app``: file databases get a pool of
+    ``DB_POOL_SIZE`` reusable connections instead of one new connection per
+    checkout, and every connection gets the ``SQLITE_*`` pragmas (WAL
+    journal, synchronous, mmap, page cache and busy timeout) when it opens.
+    In-memory databases are left as SQLite makes them.
+    """
+    binds = [None] + list(app.config.get('SQLALCHEMY_BINDS') or ())
+    uris = [app.config['SQLALCHEMY_DATABASE_URI']] + list((app.config.get('SQLALCHEMY_BINDS') or {}).values())
+    # The engine options are shared by every bind
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if all(_is_sqlite_file(uri) for uri in uris):
+        options.setdefault('poolclass', QueuePool)
+    if options.get('poolclass') is QueuePool:
+        options.setdefault('pool_size', app.config.get('DB_POOL_SIZE', 5))
+        options.setdefault('max_overflow', app.config.get('DB_POOL_MAX_OVERFLOW', 10))
+        options.setdefault('pool_timeout', app.config.get('DB_POOL_TIMEOUT', 30))
+        # Pooled connections move between threads, only one thread uses them at a time
+        options.setdefault('connect_args', {}).setdefault('check_same_thread', False)
+
+    pragmas = sqlite_pragmas(app.config)
+    for bind in binds:
+        engine = db.get_engine(app, bind)
+        if _is_sqlite_file(engine.url):
+            event.listen(engine, 'connect', partial(_set_pragmas, pragmas))
+
+
+def sqlite_pragmas(config):
+    return [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'wal')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'normal')),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE', -64000)),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    ]
+
+
+def _set_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas:
+        cursor.execute('PRAGMA {} = {}'.format(name, value))
+    cursor.close()
+
+
+def _is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.drivername.startswith('sqlite') and url.database not in (None, '', ':memory:')
@@ -0,0 +1,52 @@
+import csv
+import io
+
+from flask import Response, current_app, json, stream_with_context
+
+from utils.serializer import dump
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_response(query, schema, export_format, filename):
+    """
+    Streams every row of ``query`` dumped with ``schema`` as NDJSON or CSV.
+    Rows are fetched in batches with ``yield_per`` and flushed to the client
+    batch by batch, so memory use does not depend on the table size.
+    """
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    rows = query.yield_per(batch_size)
+    if export_format == 'csv':
+        generator = _csv_rows(rows, schema, batch_size)
+    else:
+        generator = _ndjson_rows(rows, schema, batch_size)
+    response = Response(stream_with_context(generator), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(filename, export_format)
+    return response
+
+
+def _ndjson_rows(rows, schema, batch_size):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dump(schema, row, many=False)))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_rows(rows, schema, batch_size):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=sorted(schema.dump_fields))
+    writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(dump(schema, row, many=False))
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
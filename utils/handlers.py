@@ -1,7 +1,9 @@
-import json
-
+from flask import jsonify
+from sqlalchemy.orm.exc import StaleDataError
 from werkzeug.exceptions import HTTPException
 
+from utils.serializer import dumps
+
 
 def register_handlers(app):
     @app.errorhandler(HTTPException)
@@ -10,10 +12,15 @@ def register_handlers(app):
         # start with the correct headers and status code from the error
         response = e.get_response()
         # replace the body with JSON
-        response.data = json.dumps({
+        response.data = dumps({
             "code": e.code,
             "name": e.name,
             "description": e.description,
         })
         response.content_type = "application/json"
         return response
+
+    @app.errorhandler(StaleDataError)
+    def handle_stale_data(e):
+        """A row changed between reading and updating it, like a failed If-Match."""
+        return jsonify(message='The resource was modified by someone else'), 412
@@ -0,0 +1,249 @@
+import cProfile
+import hmac
+import itertools
+import os
+import random
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, g, has_request_context, jsonify, request
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """Cumulative ``(le, count)`` pairs, as Prometheus expects them."""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Family:
+    """A metric and its children by label values."""
+
+    def __init__(self, name, kind, description, labels, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self.children = {}
+
+    def observe(self, values, value):
+        histogram = self.children.get(values)
+        if histogram is None:
+            histogram = self.children[values] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def inc(self, values, value=1):
+        self.children[values] = self.children.get(values, 0) + value
+
+    def render(self, lines):
+        lines.append('# HELP {} {}'.format(self.name, self.description))
+        lines.append('# TYPE {} {}'.format(self.name, self.kind))
+        for values, child in sorted(self.children.items()):
+            labels = list(zip(self.labels, values))
+            if self.kind == 'histogram':
+                for bound, count in child.samples():
+                    lines.append(_sample(self.name + '_bucket', labels + [('le', bound)], count))
+                lines.append(_sample(self.name + '_sum', labels, child.sum))
+                lines.append(_sample(self.name + '_count', labels, child.count))
+            else:
+                lines.append(_sample(self.name, labels, child))
+
+
+class Metrics:
+    """
+    Request metrics exposed in the Prometheus text format on ``/metrics``:
+    latency, SQL statements and SQL time per endpoint (from the query budget
+    counter), the time spent in the phases marked with ``timed`` (JWT checks,
+    user loading, serialization) and response status codes. The ``stats`` of
+    the caches and pools registered with ``register_stats`` are reported as
+    gauges on every scrape.
+
+    Metrics are off unless ``METRICS_ENABLED`` is set. With ``METRICS_TOKEN``
+    the endpoint answers only requests sending ``Authorization: Bearer
+    <token>``; without it, keep the path away from the public, e.g. in the
+    proxy configuration.
+
+    Every process keeps its own metrics; with several server workers each one
+    is scraped separately (or one of them is, as a sample).
+
+    With ``METRICS_PROFILE_SAMPLE_RATE`` above 0 that fraction of the requests
+    is run under cProfile, and the profiles of the ones slower than
+    ``METRICS_PROFILE_THRESHOLD`` seconds are written to ``METRICS_PROFILE_DIR``
+    (one request at a time is profiled per process).
+    """
+
+    def __init__(self, app=None):
+        self.prefix = 'lostandfound'
+        self.profile_sample_rate = 0.0
+        self.profile_threshold = 0.5
+        self.profile_directory = None
+        self.token = None
+        self._stats = {}
+        self._lock = Lock()
+        self._profiler_lock = Lock()
+        self._families = {}
+        self._profiles = itertools.count()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', False):
+            return
+        self.token = app.config.get('METRICS_TOKEN')
+        self.profile_sample_rate = app.config.get('METRICS_PROFILE_SAMPLE_RATE', 0.0)
+        self.profile_threshold = app.config.get('METRICS_PROFILE_THRESHOLD', 0.5)
+        self.profile_directory = app.config.get('METRICS_PROFILE_DIR') or os.path.join(app.root_path, 'profiles')
+
+        self.requests = self._family('http_requests_total', 'counter', 'Requests by endpoint, method and status code.',
+                                     ('endpoint', 'method', 'status'))
+        self.latency = self._family('http_request_duration_seconds', 'histogram', 'Request latency.',
+                                    ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.queries = self._family('http_request_sql_queries', 'histogram', 'SQL statements run per request.',
+                                    ('endpoint',), QUERY_BUCKETS)
+        self.query_time = self._family('http_request_sql_duration_seconds', 'histogram',
+                                       'Time spent running SQL per request.', ('endpoint',), LATENCY_BUCKETS)
+        self.phases = self._family('http_request_phase_duration_seconds', 'histogram',
+                                   'Time spent per request in JWT checks, user loading, serialization and '
+                                   'compression.',
+                                   ('endpoint', 'phase'), LATENCY_BUCKETS)
+
+        app.extensions['metrics'] = self
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.teardown_request(self._stop_profiler)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.expose)
+
+    def register_stats(self, name, stats):
+        """Reports every value of the dict returned by ``stats()`` as the gauge ``<prefix>_<name>_<key>``."""
+        self._stats[name] = stats
+
+    def observe_phase(self, endpoint, phase, seconds):
+        """Records time spent in ``phase`` once the request is over, e.g. compressing a streamed body."""
+        with self._lock:
+            self.phases.observe((endpoint or 'unmatched', phase), seconds)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for family in self._families.values():
+                family.render(lines)
+        for name, stats in sorted(self._stats.items()):
+            for key, value in sorted(stats().items()):
+                metric = '{}_{}_{}'.format(self.prefix, name, key)
+                lines.append('# TYPE {} gauge'.format(metric))
+                lines.append(_sample(metric, [], value))
+        return '\n'.join(lines) + '\n'
+
+    def expose(self):
+        if self.token and not hmac.compare_digest(request.headers.get('Authorization', ''), 'Bearer ' + self.token):
+            return jsonify(message='Missing or invalid metrics token'), 401
+        return current_app.response_class(self.render(), mimetype=PROMETHEUS_MIMETYPE)
+
+    def _family(self, name, kind, description, labels, buckets=None):
+        family = Family('{}_{}'.format(self.prefix, name), kind, description, labels, buckets)
+        self._families[name] = family
+        return family
+
+    def _start(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_phases = {}
+        if self.profile_sample_rate and random.random() < self.profile_sample_rate \
+                and self._profiler_lock.acquire(blocking=False):
+            g.metrics_profiler = cProfile.Profile()
+            g.metrics_profiler.enable()
+
+    def _record(self, response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+        # Unknown URLs share one label so scanners can't blow up the number of series
+        endpoint = request.endpoint or 'unmatched'
+        counter = g.get('query_counter')
+        with self._lock:
+            self.requests.inc((endpoint, request.method, str(response.status_code)))
+            self.latency.observe((endpoint, request.method), duration)
+            if counter is not None:
+                self.queries.observe((endpoint,), counter.count)
+                self.query_time.observe((endpoint,), counter.duration)
+            for phase, spent in g.metrics_phases.items():
+                self.phases.observe((endpoint, phase), spent)
+        profiler = self._stop_profiler()
+        if profiler is not None and duration >= self.profile_threshold:
+            self._dump_profile(profiler, endpoint, duration)
+        return response
+
+    def _stop_profiler(self, exc=None):
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._profiler_lock.release()
+        return profiler
+
+    def _dump_profile(self, profiler, endpoint, duration):
+        os.makedirs(self.profile_directory, exist_ok=True)
+        name = '{}-{}-{}-{}-{}ms.prof'.format(time.strftime('%Y%m%dT%H%M%S'), os.getpid(), next(self._profiles),
+                                               endpoint, int(duration * 1000))
+        profiler.dump_stats(os.path.join(self.profile_directory, name))
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to the ``phase`` of the current request."""
+    phases = g.get('metrics_phases') if has_request_context() else None
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+def timed_phase(phase):
+    """Decorator version of ``timed``."""
+    def timed_phase_decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return timed_phase_decorator
+
+
+def _sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join('{}="{}"'.format(label, _escape(value)) for label, value in labels) + '}'
+    return '{} {}'.format(name, _format(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    return repr(value) if isinstance(value, float) else str(value)
@@ -1,4 +1,4 @@
-from flask_jwt_extended import get_jwt_identity, current_user
+from flask_jwt_extended import get_jwt_identity, get_jwt_claims, current_user
 from sqlalchemy.ext.declarative import declared_attr
 
 from app import db
@@ -12,6 +12,13 @@ class BaseModel(db.Model):
     updated_on = db.Column(db.DateTime,
                            default=db.func.now(),
                            onupdate=db.func.now())
+    # Bumped by every update and part of the ETags, updated_on only has a resolution of one second
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    @declared_attr
+    def __mapper_args__(self):
+        # UPDATEs also check the version that was read, a concurrent write makes them raise StaleDataError
+        return {'version_id_col': self.version}
 
     @declared_attr
     def created_by_id(self):
@@ -39,6 +46,23 @@ class BaseModel(db.Model):
                                foreign_keys=[self.updated_by_id])
 
 
+class Counter(db.Model):
+    """A row count maintained by ``app.counters``, e.g. the active users."""
+    name = db.Column(db.String(50), primary_key=True)
+    key = db.Column(db.String(200), primary_key=True, default='')
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RateLimit(db.Model):
+    """The bucket of a rate limit key, see ``utils.ratelimit``."""
+    key = db.Column(db.String(300), primary_key=True)
+    tat = db.Column(db.Float, nullable=False, index=True)
+
+
 def _current_user_id_or_none():
+    # Tokens minted with JWT_ROLE_CLAIMS carry the id, no need to load the user mid-flush
+    user_id = get_jwt_claims().get('id')
+    if user_id is not None:
+        return user_id
     logged_user = current_user
     return logged_user.id if logged_user else None
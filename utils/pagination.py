@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import tuple_
+from werkzeug.exceptions import BadRequest
+
+# JSON types a cursor value may have, by the Python type of its column
+CURSOR_TYPES = {int: (int,), float: (int, float), str: (str,)}
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    data = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise BadRequest('Invalid cursor')
+
+
+def _cursor_value(column, value):
+    # Only scalars of the column's type may reach the comparison
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if isinstance(value, bool) or not isinstance(value, CURSOR_TYPES.get(python_type, (str, int, float))):
+        raise ValueError('Invalid cursor value')
+    return value
+
+
+def with_total_count():
+    """
+    Whether the client asked for ``X-Total-Count`` (``count=true``). Counting
+    reads every matching row, so keyset pages skip it unless asked.
+    """
+    return request.args.get('count', 'false').lower() == 'true'
+
+
+def get_per_page():
+    per_page = request.args.get('per_page', current_app.config.get('PAGINATION_PER_PAGE', 10), type=int)
+    return max(1, min(per_page, current_app.config.get('PAGINATION_MAX_PER_PAGE', 100)))
+
+
+def keyset_paginate(query, columns, cursor, per_page, descending=False, row_values=None):
+    """
+    Returns a page of ``query`` ordered by ``columns`` starting after
+    ``cursor``, and the cursor for the next page (``None`` on the last page).
+    ``columns`` must end with a unique column so the order is total.
+    ``row_values`` extracts the column values from a row when the rows are
+    not plain entities.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    query = query.order_by(*[column.desc() if descending else column for column in columns])
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        if row_values:
+            next_cursor = encode_cursor(row_values(items[-1]))
+        else:
+            next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
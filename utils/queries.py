@@ -0,0 +1,107 @@
+import threading
+import time
+from functools import wraps
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more SQL statements than its view's ``query_budget``, raised in tests only."""
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements (and the time spent on them) run on any engine
+    by the current thread while active. Usable as a context manager, e.g. in
+    tests (see tests/test_queries.py)::
+
+        with QueryCounter() as queries:
+            client.get('/users')
+        assert queries.count <= 4
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def __enter__(self):
+        _active_counters().append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_counters().remove(self)
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements.append(statement)
+
+
+def query_budget(max_queries):
+    """Declares how many SQL statements a request to the decorated view may run."""
+    def query_budget_decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return fn(*args, **kwargs)
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return query_budget_decorator
+
+
+def init_query_budget(app):
+    """
+    Counts the queries of every request and compares them with the view's
+    ``query_budget``. Over budget requests are logged; in tests (``TESTING``
+    and ``QUERY_BUDGET_STRICT``) they raise ``QueryBudgetExceeded`` so the
+    test fails on N+1 regressions.
+    """
+    strict = app.testing and app.config.get('QUERY_BUDGET_STRICT', False)
+
+    @app.before_request
+    def start_query_counter():
+        g.query_counter = QueryCounter().__enter__()
+
+    @app.teardown_request
+    def stop_query_counter(exc):
+        counter = g.pop('query_counter', None)
+        if counter:
+            counter.__exit__()
+
+    @app.after_request
+    def check_query_budget(response):
+        counter = g.get('query_counter')
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if counter and budget is not None and counter.count > budget:
+            message = '{} ran {} queries, budget is {}'.format(request.endpoint, counter.count, budget)
+            if strict:
+                raise QueryBudgetExceeded(message + ':\n' + '\n'.join(counter.statements))
+            app.logger.warning(message)
+        return response
+
+
+def _active_counters():
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    return _local.counters
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_counters():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_counters() and conn.info.get('query_start'):
+        duration = time.perf_counter() - conn.info['query_start'].pop()
+        for counter in _active_counters():
+            counter.record(statement, duration)
@@ -0,0 +1,272 @@
+import math
+import re
+import time
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, g, request
+from flask_jwt_extended import decode_token
+from sqlalchemy import text
+from werkzeug.exceptions import TooManyRequests
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+LIMIT = re.compile(r'^\s*(\d+)\s*/\s*(second|minute|hour|day)s?\s*$')
+
+HIT = text("INSERT INTO rate_limit (key, tat) VALUES (:key, :now + :interval) "
+           "ON CONFLICT (key) DO UPDATE SET tat = MAX(tat, :now) + :interval "
+           "WHERE MAX(tat, :now) - :now <= :tolerance")
+READ = text("SELECT tat FROM rate_limit WHERE key = :key")
+
+
+class Limit:
+    """
+    ``count`` requests per ``period`` seconds, as a token bucket holding
+    ``count`` tokens and refilled with one every ``period / count`` seconds.
+    Implemented with GCRA: only the time the bucket will be full again (the
+    theoretical arrival time, TAT) is stored per key.
+    """
+
+    def __init__(self, count, period):
+        self.count = count
+        self.period = period
+        self.interval = period / count
+        self.tolerance = period - self.interval
+
+    @classmethod
+    def parse(cls, value):
+        """Reads limits like ``'5/minute'``, or returns ``None`` for an empty value."""
+        if not value:
+            return None
+        match = LIMIT.match(value)
+        if not match or not int(match.group(1)):
+            raise ValueError('Invalid rate limit: {}'.format(value))
+        return cls(int(match.group(1)), PERIODS[match.group(2)])
+
+    def state(self, tat, now):
+        """``(remaining, reset)`` of a bucket whose TAT is ``tat``: requests left now and seconds until it is full."""
+        wait = max(tat - now, 0)
+        remaining = int((self.tolerance - wait) // self.interval) + 1 if wait <= self.tolerance else 0
+        return remaining, wait
+
+    def retry_after(self, tat, now):
+        return tat - now - self.tolerance
+
+
+class MemoryRateLimitBackend:
+    """Keeps the buckets in a dict, per process. Full buckets are dropped every ``purge_interval`` seconds."""
+
+    def __init__(self, purge_interval):
+        self.purge_interval = purge_interval
+        self._lock = Lock()
+        self._tats = {}
+        self._last_purge = 0
+
+    def hit(self, key, limit, now):
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            allowed = tat - now <= limit.tolerance
+            if allowed:
+                tat = self._tats[key] = tat + limit.interval
+            if now - self._last_purge >= self.purge_interval:
+                self.purge(now)
+            return allowed, tat
+
+    def purge(self, now):
+        self._last_purge = now
+        for key in [key for key, tat in self._tats.items() if tat <= now]:
+            del self._tats[key]
+
+
+class DatabaseRateLimitBackend:
+    """
+    Keeps the buckets in the ``rate_limit`` table so every worker shares them.
+    A hit is one UPSERT and one read by primary key in a transaction of its
+    own, outside the request session.
+    """
+
+    def __init__(self, db, rate_limit_model, purge_interval):
+        self.db = db
+        self.rate_limit_model = rate_limit_model
+        self.purge_interval = purge_interval
+        self._last_purge = 0
+
+    def hit(self, key, limit, now):
+        with self.db.engine.begin() as connection:
+            # The update is skipped when the bucket is empty
+            allowed = connection.execute(HIT, key=key, now=now, interval=limit.interval,
+                                         tolerance=limit.tolerance).rowcount > 0
+            tat = connection.execute(READ, key=key).scalar()
+        if now - self._last_purge >= self.purge_interval:
+            self.purge(now)
+        return allowed, tat
+
+    def purge(self, now):
+        self._last_purge = now
+        with self.db.engine.begin() as connection:
+            connection.execute(self.rate_limit_model.__table__.delete().where(self.rate_limit_model.tat <= now))
+
+
+class RateLimiterState:
+    """The backend and limits of one app, kept in ``app.extensions['rate_limiter']``."""
+
+    def __init__(self, backend, default=None, blueprints=None, trusted_proxies=0):
+        self.backend = backend
+        self.default = default
+        self.blueprints = blueprints or {}
+        self.trusted_proxies = trusted_proxies
+        self.limits = {}
+
+
+class RateLimiter:
+    """
+    Rejects requests over their limits with 429 before the view runs, so
+    before any JWT check, query or password hash. Limits are counted per
+    client IP, per login email or per JWT identity (``ip``, ``email`` and
+    ``identity``):
+
+    - ``RATELIMIT_DEFAULT`` applies to every request, per identity when it
+      carries a valid access token and per IP otherwise;
+    - ``RATELIMIT_BLUEPRINTS`` adds limits per IP to the views of a blueprint;
+    - the ``rate_limit`` decorator adds the limit held by a setting to a view.
+
+    Behind ``RATELIMIT_TRUSTED_PROXIES`` proxies the client IP is the one the
+    outermost of them added to ``X-Forwarded-For``, as with werkzeug's
+    ``ProxyFix``; entries further left are set by the client and ignored.
+
+    Limited responses carry ``RateLimit-Limit``, ``RateLimit-Remaining`` and
+    ``RateLimit-Reset`` for the closest limit, and ``Retry-After`` when
+    rejected. The backend is picked from ``RATELIMIT_BACKEND``: ``database``
+    (shared by every worker) or ``memory`` (per process, so every limit is
+    multiplied by the number of workers). The backend and limits are kept per
+    app in ``app.extensions['rate_limiter']``.
+    """
+
+    def __init__(self, app=None, db=None):
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        from utils.models import RateLimit
+
+        if not app.config.get('RATELIMIT_ENABLED', True):
+            return
+        purge_interval = app.config.get('RATELIMIT_PURGE_INTERVAL', 300)
+        backend = app.config.get('RATELIMIT_BACKEND', 'database')
+        if backend == 'memory':
+            backend = MemoryRateLimitBackend(purge_interval)
+        elif backend == 'database':
+            backend = DatabaseRateLimitBackend(db, RateLimit, purge_interval)
+        else:
+            raise ValueError('Unknown RATELIMIT_BACKEND: {}'.format(backend))
+        app.extensions['rate_limiter'] = RateLimiterState(
+            backend, Limit.parse(app.config.get('RATELIMIT_DEFAULT')),
+            dict((name, Limit.parse(value)) for name, value in (app.config.get('RATELIMIT_BLUEPRINTS') or {}).items()),
+            app.config.get('RATELIMIT_TRUSTED_PROXIES', 0))
+
+        @app.before_request
+        def check_rate_limits():
+            state = app.extensions['rate_limiter']
+            view = app.view_functions.get(request.endpoint)
+            rules = []
+            if state.default:
+                identity = _identity()
+                rules.append(('default', 'identity', identity, state.default) if identity
+                             else ('default', 'ip', _client_address(state), state.default))
+            if request.blueprint in state.blueprints:
+                rules.append((request.blueprint, 'ip', _client_address(state), state.blueprints[request.blueprint]))
+            for setting, by in getattr(view, 'rate_limits', ()):
+                if setting not in state.limits:
+                    state.limits[setting] = Limit.parse(app.config.get(setting))
+                limit = state.limits[setting]
+                value = _key_value(by, state)
+                if limit and value:
+                    rules.append((request.endpoint, by, value, limit))
+            if rules:
+                self.check(rules)
+
+        @app.after_request
+        def add_rate_limit_headers(response):
+            headers = g.pop('rate_limit_headers', None)
+            if headers:
+                response.headers.extend(headers)
+            return response
+
+    def hit(self, key, limit):
+        """Counts a request against ``limit`` for ``key``, returns ``(allowed, remaining, reset, retry_after)``."""
+        now = time.time()
+        allowed, tat = current_app.extensions['rate_limiter'].backend.hit(key, limit, now)
+        remaining, reset = limit.state(tat, now)
+        return allowed, remaining, reset, None if allowed else limit.retry_after(tat, now)
+
+    def check(self, rules):
+        """Counts the request against every ``(scope, by, value, limit)`` rule, raises 429 when one is exceeded."""
+        closest = None
+        for scope, by, value, limit in rules:
+            key = '{}:{}:{}/{}:{}'.format(scope, by, limit.count, limit.period, value)
+            allowed, remaining, reset, retry_after = self.hit(key, limit)
+            if closest is None or remaining < closest[1]:
+                closest = (limit, remaining, reset)
+            if not allowed:
+                g.rate_limit_headers = _headers(limit, 0, reset)
+                raise TooManyRequests('Too many requests, retry in {} seconds'.format(math.ceil(retry_after)),
+                                      retry_after=math.ceil(retry_after))
+        g.rate_limit_headers = _headers(*closest)
+
+
+def rate_limit(setting, by='ip'):
+    """
+    Limits the requests to the decorated view to the value of the ``setting``
+    config (e.g. ``'5/minute'``, no limit when empty), counted per ``by``:
+    ``ip``, ``email`` (from the JSON body) or ``identity`` (from the JWT).
+    """
+    def rate_limit_decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return fn(*args, **kwargs)
+
+        wrapper.rate_limits = getattr(fn, 'rate_limits', ()) + ((setting, by),)
+        return wrapper
+
+    return rate_limit_decorator
+
+
+def _key_value(by, state):
+    if by == 'ip':
+        return _client_address(state)
+    if by == 'email':
+        data = request.get_json(silent=True)
+        email = data.get('email') if isinstance(data, dict) else None
+        return email.strip().lower() if isinstance(email, str) else None
+    if by == 'identity':
+        return _identity()
+    raise ValueError('Unknown rate limit key: {}'.format(by))
+
+
+def _client_address(state):
+    """The client IP: the entry the outermost trusted proxy added to ``X-Forwarded-For``, or the peer address."""
+    if state.trusted_proxies:
+        forwarded = [address.strip() for address in request.headers.get('X-Forwarded-For', '').split(',')]
+        if len(forwarded) >= state.trusted_proxies and forwarded[-state.trusted_proxies]:
+            return forwarded[-state.trusted_proxies]
+    return request.remote_addr
+
+
+def _identity():
+    """Identity of the valid access token of the request, decoded once without touching the database."""
+    if 'rate_limit_identity' not in g:
+        header = request.headers.get(current_app.config['JWT_HEADER_NAME'], '')
+        parts = header.split()
+        identity = None
+        if len(parts) == 2 and parts[0] == current_app.config['JWT_HEADER_TYPE']:
+            try:
+                identity = decode_token(parts[1])[current_app.config['JWT_IDENTITY_CLAIM']]
+            except Exception:
+                # Invalid tokens are counted per IP, the view rejects them later
+                pass
+        g.rate_limit_identity = identity
+    return g.rate_limit_identity
+
+
+def _headers(limit, remaining, reset):
+    return [('RateLimit-Limit', str(limit.count)), ('RateLimit-Remaining', str(remaining)),
+            ('RateLimit-Reset', str(math.ceil(reset)))]
@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+
+from auth.cache import TTLCache
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session sending the queries of ``read_only`` views to the ``replica``
+    bind, when one is configured. Flushes, every query after the session
+    wrote and the requests of users who wrote in the last
+    ``REPLICA_STICKY_SECONDS`` go to the primary, so users read their own writes.
+
+    The recent writers are remembered per process: with several workers, a
+    request served by another worker than the one that took the write may
+    still read the replica. Reads that must not be stale (token checks, the
+    users kept by ``UserCache``) use ``use_primary`` instead.
+    """
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._use_replica():
+            return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+    def _use_replica(self):
+        if self._flushing or self.info.get('wrote') or not has_request_context() or not g.get('use_replica'):
+            return False
+        identity = get_jwt_identity()
+        return identity is None or current_app.extensions['recent_writers'].get(identity) is None
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_writer(session):
+    if session.info.get('wrote') and has_request_context():
+        identity = get_jwt_identity()
+        if identity is not None:
+            current_app.extensions['recent_writers'].set(identity, True)
+
+
+def read_only(fn):
+    """Marks a view whose queries may be answered by the read replica."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return fn(*args, **kwargs)
+
+    wrapper.read_only = True
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Sends the queries run inside the block to the primary, e.g. security checks that can't read stale data."""
+    use_replica = g.get('use_replica', False)
+    g.use_replica = False
+    try:
+        yield
+    finally:
+        g.use_replica = use_replica
+
+
+def init_routing(app):
+    app.extensions['recent_writers'] = TTLCache(app.config.get('REPLICA_STICKY_USERS', 10000),
+                                                app.config.get('REPLICA_STICKY_SECONDS', 5))
+    has_replica = REPLICA_BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+    @app.before_request
+    def route_reads():
+        view = app.view_functions.get(request.endpoint)
+        g.use_replica = has_replica and getattr(view, 'read_only', False)
@@ -0,0 +1,34 @@
+from marshmallow.fields import Nested
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+
+def eager_load_options(schema):
+    """
+    Loader options for the relationships dumped by ``schema`` (including
+    nested schemas), so a page of rows costs one extra query per collection
+    instead of one per row. Many-to-one relationships (e.g. ``created_by``)
+    are joined to the query of their parent rows and cost none. Excluded
+    relationships are not loaded.
+    """
+    return list(_load_paths(schema, None))
+
+
+def _load_paths(schema, parent):
+    model = getattr(schema.opts, 'model', None)
+    if model is None:
+        return
+    relationships = inspect(model).relationships
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        if attribute not in relationships:
+            continue
+        column = getattr(model, attribute)
+        if relationships[attribute].direction is MANYTOONE:
+            loader = parent.joinedload(column) if parent is not None else joinedload(column)
+        else:
+            loader = parent.selectinload(column) if parent is not None else selectinload(column)
+        yield loader
+        if isinstance(field, Nested):
+            yield from _load_paths(field.schema, loader)
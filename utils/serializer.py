@@ -0,0 +1,120 @@
+from weakref import WeakKeyDictionary
+
+from flask import current_app, json
+from marshmallow import fields, missing
+from marshmallow.utils import get_func_args
+from marshmallow_enum import EnumField, LoadDumpOptions
+from marshmallow_sqlalchemy.fields import Related, RelatedList
+
+from utils.metrics import timed_phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_compiled = WeakKeyDictionary()
+
+
+@timed_phase('serialization')
+def dump(schema, obj, many=None):
+    """
+    Same result as ``schema.dump(obj)``, using accessors precomputed once
+    per schema instead of marshmallow's per field dispatch. ``obj`` may be a
+    model instance or any row with attribute access (e.g. a query of columns).
+    """
+    return _dump(schema, obj, many)
+
+
+def _dump(schema, obj, many=None):
+    compiled = _compiled.get(schema)
+    if compiled is None:
+        compiled = _compiled[schema] = _compile(schema)
+    if schema.many if many is None else many:
+        return [compiled(item) for item in obj]
+    return compiled(obj)
+
+
+@timed_phase('serialization')
+def dumps(data):
+    """
+    Encodes ``data`` like ``jsonify`` does. With ``JSON_ENCODER = 'orjson'``
+    (and orjson installed) the faster orjson encoder is used instead; its
+    output only differs for non-ASCII text, written as UTF-8 instead of
+    escaped, and for floats with exponents.
+    """
+    if orjson is not None and current_app.config.get('JSON_ENCODER') == 'orjson':
+        option = orjson.OPT_SORT_KEYS if current_app.config['JSON_SORT_KEYS'] else 0
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, separators=(',', ':'))
+
+
+def json_response(data, status=None):
+    """Fast path for ``jsonify(data)``, with the same body and headers."""
+    if current_app.config['JSONIFY_PRETTYPRINT_REGULAR'] or current_app.debug:
+        response = json.jsonify(data)
+    else:
+        body = dumps(data)
+        response = current_app.response_class(body + (b'\n' if isinstance(body, bytes) else '\n'),
+                                              mimetype=current_app.config['JSONIFY_MIMETYPE'])
+    if status is not None:
+        response.status_code = status
+    return response
+
+
+def _compile(schema):
+    accessors = [(field.data_key or name, _accessor(schema, name, field)) for name, field in schema.dump_fields.items()]
+
+    def serialize(obj):
+        result = {}
+        for key, accessor in accessors:
+            value = accessor(obj)
+            if value is not missing:
+                result[key] = value
+        return result
+
+    return serialize
+
+
+def _accessor(schema, name, field):
+    attribute = field.attribute or name
+    kind = type(field)
+    if kind in (fields.Integer, fields.Float) and not field.as_string:
+        convert = int if kind is fields.Integer else float
+        return _getter(attribute, lambda value: convert(value))
+    if kind is fields.String:
+        return _getter(attribute, lambda value: value if isinstance(value, str) else str(value))
+    if kind is fields.Boolean:
+        return _getter(attribute, lambda value: field._serialize(value, attribute, None))
+    if kind is fields.DateTime and (field.format or field.DEFAULT_FORMAT) == 'iso':
+        return _getter(attribute, lambda value: value.isoformat())
+    if kind is EnumField:
+        if field.dump_by == LoadDumpOptions.value:
+            return _getter(attribute, lambda value: value.value)
+        return _getter(attribute, lambda value: value.name)
+    if kind is Related and len(field.related_keys) == 1:
+        key = field.related_keys[0].key
+        return _getter(attribute, lambda value: getattr(value, key, None))
+    if kind is RelatedList and type(field.inner) is Related and len(field.inner.related_keys) == 1:
+        key = field.inner.related_keys[0].key
+        return _getter(attribute, lambda value: [getattr(each, key, None) for each in value])
+    if kind is fields.Function and field.serialize_func is not None:
+        function = field.serialize_func
+        if len(get_func_args(function)) > 1:
+            return lambda obj: function(obj, field.parent.context)
+        return function
+    if kind is fields.Nested:
+        nested = field.schema
+        return _getter(attribute, lambda value: _dump(nested, value, field.many))
+    # Anything else is serialized by marshmallow itself
+    return lambda obj: field.serialize(name, obj, accessor=schema.get_attribute)
+
+
+def _getter(attribute, convert):
+    def get(obj):
+        value = getattr(obj, attribute, missing)
+        if value is None or value is missing:
+            return value
+        return convert(value)
+
+    return get